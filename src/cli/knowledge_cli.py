@@ -3,14 +3,29 @@
 import argparse
 import sys
 
+from src.config import get_graph
 from src.knowledge_system import Ingestion, RelationshipManager, QueryLibrary
+from src.shared.schema import ensure_schema
 
 
 def ingest_command(args):
     """Comando para ingerir conhecimento"""
     print(f"📥 Iniciando ingestão de: {args.path}\n")
     ingestion = Ingestion()
-    count = ingestion.ingest_directory(args.path)
+    ensure_schema(ingestion.graph)
+    count = ingestion.ingest_directory(args.path, workers=args.workers,
+                                       batch_embeddings=args.batch_embeddings,
+                                       write_batch_size=args.write_batch,
+                                       incremental=not args.full,
+                                       chunking=args.chunks,
+                                       chunk_size=args.chunk_size,
+                                       chunk_overlap=args.chunk_overlap,
+                                       resume=args.resume,
+                                       batch_classification=args.batch_classification,
+                                       fast_classification=not args.llm_only,
+                                       near_duplicates=not args.no_near_duplicates,
+                                       reuse_similar=args.reuse_similar,
+                                       ann_index=args.ann or None)
     print(f"\n✅ Processamento concluído: {count} itens ingeridos")
 
 
@@ -18,7 +33,13 @@ def relationships_command(args):
     """Comando para criar relacionamentos semânticos"""
     print(f"🔗 Criando relacionamentos semânticos...\n")
     manager = RelationshipManager()
-    count = manager.create_semantic_relationships(threshold=args.threshold)
+    ensure_schema(manager.graph)
+    count = manager.create_semantic_relationships(threshold=args.threshold, engine=args.engine,
+                                                  k=args.k, workers=args.workers,
+                                                  memory_mb=args.memory_mb,
+                                                  rebuild_ann=args.rebuild_ann,
+                                                  full=args.full,
+                                                  write_batch_size=args.write_batch_size)
     print(f"\n✅ {count} relacionamentos criados")
 
 
@@ -27,14 +48,28 @@ def clusters_command(args):
     print(f"🧩 Detectando clusters de conhecimento...\n")
     manager = RelationshipManager()
 
-    clusters = manager.detect_clusters(min_connections=args.min_connections)
-    evolutions = manager.detect_evolutions()
+    if args.engine == 'ego':
+        clusters = manager.detect_clusters(min_connections=args.min_connections)
+    else:
+        clusters = manager.detect_communities(min_size=args.min_size,
+                                              min_score=args.min_score, full=args.full)
+    evolutions = manager.detect_evolutions(full=args.full)
 
     print(f"\n✅ Análise concluída:")
     print(f"   - {len(clusters)} clusters detectados")
     print(f"   - {len(evolutions)} evoluções identificadas")
 
 
+def schema_command(args):
+    """Comando para criar constraints e índices"""
+    print(f"🗂️ Verificando schema do grafo...\n")
+    result = ensure_schema(get_graph(), verbose=args.show)
+    print(f"\n✅ {len(result['criados'])} criados, {len(result['existentes'])} existentes, "
+          f"{len(result['falhas'])} falhas")
+    if result['falhas']:
+        sys.exit(1)
+
+
 def dashboard_command(args):
     """Comando para mostrar dashboard"""
     print(f"📊 Dashboard de Conhecimento\n")
@@ -94,6 +129,25 @@ def query_command(args):
     print(f"💬 {result['result']}\n")
 
 
+def cache_command(args):
+    """Comando para inspecionar e limpar o cache de respostas do LLM"""
+    from src.shared.llm_cache import LLMCache
+
+    cache = LLMCache()
+
+    if args.purge:
+        removed = cache.purge(prompt_version=args.prompt_version, model=args.model)
+        print(f"🗑️ {removed} respostas removidas do cache")
+
+    stats = cache.stats()
+    print(f"🗃️ Cache do LLM: {stats['path']}")
+    print(f"   Entradas: {stats['entradas']}")
+    print(f"   Tamanho: {stats['bytes'] / 1024 / 1024:.2f} MB "
+          f"(limite: {stats['max_bytes'] / 1024 / 1024:.0f} MB)")
+    for entry in stats['por_prompt']:
+        print(f"   {entry['prompt_version']:20s} {entry['modelo']:30s}: {entry['qtd']:6d} respostas")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="CLI para Sistema de Conhecimento Pessoal"
@@ -103,16 +157,74 @@ def main():
     # Subcomando: ingest
     ingest_parser = subparsers.add_parser('ingest', help='Ingerir conhecimento de um diretório')
     ingest_parser.add_argument('path', help='Caminho do diretório para ingerir')
+    ingest_parser.add_argument('--workers', type=int, default=4,
+                              help='Arquivos processados em paralelo (padrão: 4)')
+    ingest_parser.add_argument('--batch-embeddings', action='store_true',
+                              help='Agrupar embeddings de vários arquivos por chamada')
+    ingest_parser.add_argument('--write-batch', type=int, default=1,
+                              help='Arquivos gravados por transação no Neo4j (padrão: 1)')
+    ingest_parser.add_argument('--full', action='store_true',
+                              help='Reprocessar todos os arquivos, ignorando o manifesto')
+    ingest_parser.add_argument('--chunks', action='store_true',
+                              help='Dividir arquivos em chunks com embeddings próprios')
+    ingest_parser.add_argument('--chunk-size', type=int, default=2000,
+                              help='Tamanho de cada chunk em caracteres (padrão: 2000)')
+    ingest_parser.add_argument('--chunk-overlap', type=int, default=200,
+                              help='Sobreposição entre chunks (padrão: 200)')
+    ingest_parser.add_argument('--resume', action='store_true',
+                              help='Retomar a última ingestão interrompida deste diretório')
+    ingest_parser.add_argument('--batch-classification', action='store_true',
+                              help='Classificar arquivos curtos em grupo (vários por chamada ao LLM)')
+    ingest_parser.add_argument('--llm-only', action='store_true',
+                              help='Classificar todos os arquivos com o LLM, sem as regras por extensão')
+    ingest_parser.add_argument('--no-near-duplicates', action='store_true',
+                              help='Não detectar quase-duplicatas (índice MinHash local)')
+    ingest_parser.add_argument('--reuse-similar', action='store_true',
+                              help='Reaproveitar a classificação de arquivos quase idênticos')
+    ingest_parser.add_argument('--ann', action='store_true',
+                              help='Espelhar os embeddings no índice ANN local (ou ANN_INDEX=true)')
 
     # Subcomando: relationships
     rel_parser = subparsers.add_parser('relationships', help='Criar relacionamentos semânticos')
     rel_parser.add_argument('--threshold', type=float, default=0.75,
                            help='Limiar de similaridade (padrão: 0.75)')
+    rel_parser.add_argument('--engine', choices=['stored', 'names', 'numpy', 'ann'],
+                           default='stored',
+                           help='stored: embeddings já gravados nos itens, sem chamadas à API; '
+                                'names: embedding de "nome tipo" de cada item; '
+                                'numpy: kNN exato calculado localmente; '
+                                'ann: índice ANN local (padrão: stored)')
+    rel_parser.add_argument('--k', type=int, default=10,
+                           help='Vizinhos por item (padrão: 10)')
+    rel_parser.add_argument('--workers', type=int, default=1,
+                           help='Processos da engine numpy (padrão: 1)')
+    rel_parser.add_argument('--memory-mb', type=int, default=512,
+                           help='Memória de trabalho da engine numpy em MB (padrão: 512)')
+    rel_parser.add_argument('--rebuild-ann', action='store_true',
+                           help='Recriar o índice ANN local a partir do grafo (engine ann)')
+    rel_parser.add_argument('--full', action='store_true',
+                           help='Recalcular todos os itens, não só os gravados desde a última execução')
+    rel_parser.add_argument('--write-batch-size', type=int, default=1000,
+                           help='Arestas gravadas por query (padrão: 1000)')
 
     # Subcomando: clusters
     cluster_parser = subparsers.add_parser('clusters', help='Detectar clusters de conhecimento')
     cluster_parser.add_argument('--min-connections', type=int, default=2,
-                               help='Mínimo de conexões para cluster (padrão: 2)')
+                               help='Mínimo de conexões para cluster na engine ego (padrão: 2)')
+    cluster_parser.add_argument('--engine', choices=['communities', 'ego'], default='communities',
+                               help="'communities' grava nós Cluster por propagação de rótulos; "
+                                    "'ego' lista itens centrais sem gravar (padrão: communities)")
+    cluster_parser.add_argument('--min-size', type=int, default=3,
+                               help='Mínimo de itens por comunidade (padrão: 3)')
+    cluster_parser.add_argument('--min-score', type=float, default=0.75,
+                               help='Score mínimo das arestas consideradas (padrão: 0.75)')
+    cluster_parser.add_argument('--full', action='store_true',
+                               help='Recalcular comunidades e evoluções do zero')
+
+    # Subcomando: schema
+    schema_parser = subparsers.add_parser('schema', help='Criar constraints e índices do grafo')
+    schema_parser.add_argument('--show', action='store_true',
+                              help='Listar também constraints/índices já existentes')
 
     # Subcomando: dashboard
     subparsers.add_parser('dashboard', help='Mostrar dashboard de conhecimento')
@@ -123,6 +235,14 @@ def main():
     query_parser.add_argument('--show-cypher', action='store_true',
                             help='Mostrar query Cypher gerada')
 
+    # Subcomando: cache
+    cache_parser = subparsers.add_parser('cache', help='Inspecionar/limpar o cache do LLM')
+    cache_parser.add_argument('--purge', action='store_true',
+                             help='Remover respostas do cache')
+    cache_parser.add_argument('--prompt-version',
+                             help='Limitar a limpeza a uma versão de prompt')
+    cache_parser.add_argument('--model', help='Limitar a limpeza a um modelo')
+
     args = parser.parse_args()
 
     if not args.command:
@@ -133,8 +253,10 @@ def main():
         'ingest': ingest_command,
         'relationships': relationships_command,
         'clusters': clusters_command,
+        'schema': schema_command,
         'dashboard': dashboard_command,
         'query': query_command,
+        'cache': cache_command,
     }
 
     commands[args.command](args)
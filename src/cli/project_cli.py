@@ -4,13 +4,16 @@ import argparse
 import sys
 
 from src.project_governance import ProjectIndexer, SimilarityEngine, VersionManager
+from src.shared.schema import ensure_schema
 
 
 def index_project_command(args):
     """Comando para indexar projeto"""
     print(f"📁 Indexando projeto: {args.path}\n")
     indexer = ProjectIndexer()
-    count = indexer.index_project(args.path)
+    ensure_schema(indexer.graph)
+    count = indexer.index_project(args.path, batch_embeddings=args.batch_embeddings,
+                                  resume=args.resume)
     print(f"\n✅ Projeto indexado com {count} arquivos")
 
 
@@ -19,7 +22,8 @@ def similarity_command(args):
     print(f"🔗 Calculando similaridades entre projetos...\n")
     engine = SimilarityEngine()
     engine.calculate_project_embeddings()
-    count = engine.connect_similar_projects(threshold=args.threshold)
+    count = engine.connect_similar_projects(threshold=args.threshold, engine=args.engine,
+                                            rebuild_ann=args.rebuild_ann)
     print(f"\n✅ {count} conexões similares criadas")
 
 
@@ -109,11 +113,20 @@ def main():
     # Subcomando: index
     index_parser = subparsers.add_parser('index', help='Indexar um projeto')
     index_parser.add_argument('path', help='Caminho do diretório do projeto')
+    index_parser.add_argument('--batch-embeddings', action='store_true',
+                             help='Agrupar embeddings de vários arquivos por chamada')
+    index_parser.add_argument('--resume', action='store_true',
+                             help='Retomar a última indexação interrompida deste projeto')
 
     # Subcomando: similarity
     sim_parser = subparsers.add_parser('similarity', help='Calcular similaridades entre projetos')
     sim_parser.add_argument('--threshold', type=float, default=0.7,
                            help='Limiar de similaridade (padrão: 0.7)')
+    sim_parser.add_argument('--engine', choices=['index', 'ann'], default='index',
+                           help='index: índice vetorial do Neo4j; ann: índice ANN local (padrão: index)')
+    sim_parser.add_argument('--rebuild-ann', action='store_true',
+                           help='Recriar o índice ANN local a partir do grafo (engine ann; '
+                                'necessário se os embeddings foram calculados sem ANN_INDEX=true)')
 
     # Subcomando: detect-changes
     subparsers.add_parser('detect-changes', help='Detectar mudanças na documentação')
@@ -1,7 +1,8 @@
 """Configuração com Gemini Flash 2.5 + Estratégia Híbrida de Embeddings"""
 
 import os
-from typing import Optional, Literal
+from pathlib import Path
+from typing import Optional, Literal, Tuple
 from dotenv import load_dotenv
 from langchain_neo4j import Neo4jGraph
 
@@ -28,6 +29,15 @@ class Neo4jConfig:
         return os.getenv("NEO4J_DATABASE", "neo4j")
 
 
+class StateConfig:
+    """Configuração do estado local (manifestos, caches e checkpoints)"""
+
+    @staticmethod
+    def get_state_dir() -> Path:
+        default = Path.home() / ".cache" / "neo4j-langraph"
+        return Path(os.getenv("NEO4J_LANGRAPH_STATE_DIR", str(default))).expanduser()
+
+
 def get_graph() -> Neo4jGraph:
     """Retorna instância configurada do Neo4jGraph"""
     return Neo4jGraph(
@@ -205,6 +215,61 @@ def get_embeddings(
         )
 
 
+# Tamanho de lote para embed_documents por provedor: (textos por chamada, tokens por chamada)
+EMBEDDINGS_BATCH_LIMITS = {
+    "localai": (32, 32_000),
+    "google": (100, 100_000),
+    "openai": (256, 250_000),
+    "huggingface": (64, 64_000),
+}
+
+
+def get_embeddings_batch_limits(
+    provider: Literal["localai", "google", "openai", "huggingface"] = None
+) -> Tuple[int, int]:
+    """
+    Retorna limites de lote para embeddings do provedor
+
+    Pode ser sobrescrito com EMBEDDINGS_BATCH_SIZE e EMBEDDINGS_BATCH_MAX_TOKENS.
+
+    Args:
+        provider: 'localai', 'google', 'openai', 'huggingface'
+
+    Returns:
+        Tupla (máximo de textos, máximo de tokens) por chamada
+    """
+    final_provider = provider or os.getenv("EMBEDDINGS_PROVIDER", "localai")
+    batch_size, max_tokens = EMBEDDINGS_BATCH_LIMITS.get(final_provider, EMBEDDINGS_BATCH_LIMITS["openai"])
+
+    return (
+        int(os.getenv("EMBEDDINGS_BATCH_SIZE", batch_size)),
+        int(os.getenv("EMBEDDINGS_BATCH_MAX_TOKENS", max_tokens)),
+    )
+
+
+def is_ann_index_enabled() -> bool:
+    """Indica se os embeddings devem ser espelhados no índice ANN local (ANN_INDEX)"""
+    return os.getenv("ANN_INDEX", "false").lower() == "true"
+
+
+# Orçamento de tokens do conteúdo enviado em cada tipo de chamada
+TOKEN_BUDGETS = {
+    "classification": 1500,
+    "metadata": 1000,
+    "embeddings": 2000,
+}
+
+
+def get_token_budget(kind: Literal["classification", "metadata", "embeddings"]) -> int:
+    """
+    Retorna o orçamento de tokens para o conteúdo de um tipo de chamada
+
+    Pode ser sobrescrito com CLASSIFICATION_MAX_TOKENS, METADATA_MAX_TOKENS e
+    EMBEDDINGS_MAX_TOKENS.
+    """
+    return int(os.getenv(f"{kind.upper()}_MAX_TOKENS", TOKEN_BUDGETS[kind]))
+
+
 # Funções de conveniência para cada estratégia
 
 def configure_llm_gemini(
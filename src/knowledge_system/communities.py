@@ -0,0 +1,255 @@
+"""Detecção de comunidades (propagação de rótulos) sobre as arestas RELACIONADO_A"""
+
+import random
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.shared.graph_writer import BulkEdgeWriter
+from src.shared.utils import iter_batches
+
+# Nó que guarda até quando as arestas já foram consideradas
+WATERMARK_NAME = "comunidades"
+
+# Tipos de Item que indicam conhecimento ainda não transformado em projeto
+IDEA_TYPES = ["ideia", "nota", "insight", "anotacao", "prompt"]
+PROJECT_TYPES = ["projeto", "codigo"]
+
+# Items por página ao ler a lista de adjacência
+PAGE_SIZE = 2000
+
+ADJACENCY_PAGE_QUERY = """
+MATCH (a:Item)
+WHERE $last IS NULL OR a.id > $last
+WITH a ORDER BY a.id LIMIT $limit
+OPTIONAL MATCH (a)-[r:RELACIONADO_A]-(b:Item)
+WHERE r.score >= $min_score
+RETURN a.id AS id,
+       coalesce(a.processado_em > $desde, false) AS alterado,
+       collect([b.id, r.score, coalesce(r.descoberto_em > $desde, false)]) AS vizinhos
+ORDER BY id
+"""
+
+# Nome, tema, tamanho e oportunidade de cada Cluster a partir dos membros
+DESCRIBE_CLUSTERS_QUERY = """
+UNWIND $ids AS cid
+MATCH (c:Cluster {id: cid})<-[:PERTENCE_A]-(i:Item)
+WITH c, count(i) AS tamanho,
+     sum(CASE WHEN i.tipo IN $tipos_ideia THEN 1 ELSE 0 END) AS ideias,
+     sum(CASE WHEN i.tipo IN $tipos_projeto THEN 1 ELSE 0 END) AS projetos
+OPTIONAL MATCH (c)<-[:PERTENCE_A]-(:Item)-[:SOBRE]->(t:Topico)
+WITH c, tamanho, ideias, projetos, t.nome AS topico, count(t) AS n
+ORDER BY n DESC
+WITH c, tamanho, ideias, projetos,
+     [x IN collect(topico) WHERE x IS NOT NULL][0..3] AS topicos
+SET c.tamanho = tamanho,
+    c.tema = head(topicos),
+    c.nome = CASE WHEN size(topicos) = 0 THEN 'Cluster ' + c.id
+             ELSE reduce(s = head(topicos), x IN tail(topicos) | s + ' / ' + x) END,
+    c.oportunidade = CASE WHEN ideias >= 2 AND projetos = 0
+             THEN toString(ideias) + ' ideias/notas sobre ' + coalesce(head(topicos), 'o mesmo tema')
+                  + ' ainda sem projeto'
+             ELSE null END,
+    c.atualizado_em = datetime()
+"""
+
+
+def label_propagation(neighbors: Dict[str, Dict[str, float]], labels: Dict[str, str],
+                      active: Optional[Iterable[str]] = None, max_iterations: int = 20,
+                      seed: int = 0) -> Tuple[Dict[str, str], int]:
+    """
+    Propagação de rótulos assíncrona e ponderada
+
+    Cada nó adota o rótulo com maior peso somado entre os vizinhos (mantendo
+    o atual em caso de empate). Só os nós ativos são avaliados; quando um nó
+    muda de rótulo, os vizinhos entram na próxima rodada, então partir dos
+    rótulos da execução anterior com poucos nós ativos atualiza só a região
+    do grafo que mudou.
+
+    Args:
+        neighbors: Nó -> {vizinho: peso}
+        labels: Rótulo inicial de cada nó (alterado no lugar)
+        active: Nós avaliados na primeira rodada (padrão: todos)
+        max_iterations: Limite de rodadas
+        seed: Semente da ordem de visita
+
+    Returns:
+        Tupla (rótulos, rodadas executadas)
+    """
+    rng = random.Random(seed)
+    queue = sorted(neighbors if active is None else set(active) & neighbors.keys())
+    iterations = 0
+
+    while queue and iterations < max_iterations:
+        iterations += 1
+        rng.shuffle(queue)
+        changed: Set[str] = set()
+        for node in queue:
+            weights: Dict[str, float] = defaultdict(float)
+            for other, weight in neighbors[node].items():
+                weights[labels[other]] += weight
+            if not weights:
+                continue
+            best = max(weights.values())
+            if weights.get(labels[node], 0.0) >= best - 1e-9:
+                continue
+            labels[node] = rng.choice(sorted(label for label, w in weights.items()
+                                             if w >= best - 1e-9))
+            changed.update(neighbors[node])
+        queue = sorted(changed)
+
+    return labels, iterations
+
+
+class CommunityDetector:
+    """Materializa comunidades de Items como nós Cluster com arestas PERTENCE_A"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def detect(self, min_size: int = 3, min_score: float = 0.75,
+               full: bool = False, batch_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Detecta comunidades e grava Clusters e participações em lote
+
+        Parte dos Clusters gravados na execução anterior e reavalia só os
+        Items com arestas ou conteúdo novos desde então (e, por propagação,
+        os vizinhos dos que mudarem). Só Items que trocam de Cluster têm a
+        aresta PERTENCE_A regravada.
+
+        Args:
+            min_size: Número mínimo de Items para gravar um Cluster
+            min_score: Score mínimo das arestas RELACIONADO_A consideradas
+            full: Se True, ignora os Clusters anteriores e recalcula do zero
+            batch_size: Items/arestas por query de gravação
+
+        Returns:
+            Lista de Clusters (id, nome, tema, tamanho, oportunidade), do maior
+            para o menor
+        """
+        since = self._start_pass()
+        neighbors, changed = self._load_adjacency(min_score, since)
+        edges = sum(len(n) for n in neighbors.values()) // 2
+        print(f"📥 {len(neighbors)} itens e {edges} arestas com score >= {min_score}")
+
+        previous = {} if full else self._load_memberships()
+        labels = {node: previous.get(node, f"cluster-{node}") for node in neighbors}
+        active = None if full or since is None or not previous else changed
+        if active is not None:
+            print(f"♻️ {len(active)} itens com arestas ou conteúdo novos desde a última execução")
+
+        labels, iterations = label_propagation(neighbors, labels, active=active)
+
+        sizes: Dict[str, int] = defaultdict(int)
+        for label in labels.values():
+            sizes[label] += 1
+        kept = {label for label, size in sizes.items() if size >= min_size}
+        current = {node: label for node, label in labels.items() if label in kept}
+        print(f"🧩 {len(kept)} comunidades com {min_size}+ itens ({iterations} rodadas)")
+
+        moved = [node for node in neighbors if current.get(node) != previous.get(node)]
+        if full:
+            self.graph.query("MATCH (:Item)-[r:PERTENCE_A]->(:Cluster) DELETE r")
+        else:
+            for batch in iter_batches(moved, batch_size):
+                self.graph.query("""
+                UNWIND $ids AS id
+                MATCH (:Item {id: id})-[r:PERTENCE_A]->(:Cluster)
+                DELETE r
+                """, {"ids": batch})
+
+        self.graph.query("""
+        MATCH (c:Cluster)
+        WHERE c.id IS NULL OR NOT c.id IN $ids
+        DETACH DELETE c
+        """, {"ids": sorted(kept)})
+
+        # Clusters que ganharam ou perderam membros
+        touched = sorted({current[node] for node in moved if node in current}
+                         | {previous[node] for node in moved if previous.get(node) in kept})
+        for batch in iter_batches(touched, batch_size):
+            self.graph.query("""
+            UNWIND $ids AS id
+            MERGE (c:Cluster {id: id})
+            ON CREATE SET c.detectado_em = datetime()
+            """, {"ids": batch})
+
+        with BulkEdgeWriter(self.graph, "PERTENCE_A", "Item", "Cluster",
+                            batch_size=batch_size) as writer:
+            for node in moved:
+                if node in current:
+                    writer.add(node, current[node])
+
+        for batch in iter_batches(touched, batch_size):
+            self.graph.query(DESCRIBE_CLUSTERS_QUERY, {
+                "ids": batch,
+                "tipos_ideia": IDEA_TYPES,
+                "tipos_projeto": PROJECT_TYPES,
+            })
+        print(f"💾 {writer.written} participações e {len(touched)} clusters atualizados")
+
+        self._finish_pass()
+        return self.graph.query("""
+        MATCH (c:Cluster)
+        RETURN c.id AS id, c.nome AS nome, c.tema AS tema,
+               c.tamanho AS tamanho, c.oportunidade AS oportunidade
+        ORDER BY c.tamanho DESC
+        """)
+
+    def _load_adjacency(self, min_score: float,
+                        since: Any) -> Tuple[Dict[str, Dict[str, float]], Set[str]]:
+        """
+        Lê a lista de adjacência em páginas de Items
+
+        Returns:
+            Tupla (nó -> {vizinho: score}, Items com arestas ou conteúdo novos)
+        """
+        neighbors: Dict[str, Dict[str, float]] = {}
+        changed: Set[str] = set()
+        last = None
+        while True:
+            rows = self.graph.query(ADJACENCY_PAGE_QUERY, {
+                "last": last, "limit": PAGE_SIZE, "min_score": min_score, "desde": since,
+            })
+            for row in rows:
+                adjacency = neighbors.setdefault(row["id"], {})
+                if row["alterado"]:
+                    changed.add(row["id"])
+                for other, score, new in row["vizinhos"]:
+                    if other is None:
+                        continue
+                    adjacency[other] = max(adjacency.get(other, 0.0), float(score))
+                    if new:
+                        changed.add(row["id"])
+            if len(rows) < PAGE_SIZE:
+                break
+            last = rows[-1]["id"]
+
+        # Vizinhos fora do conjunto lido (ex: Item gravado durante a leitura)
+        for node in list(neighbors):
+            neighbors[node] = {o: s for o, s in neighbors[node].items() if o in neighbors}
+        return neighbors, changed
+
+    def _load_memberships(self) -> Dict[str, str]:
+        """Cluster atual de cada Item"""
+        rows = self.graph.query("""
+        MATCH (i:Item)-[:PERTENCE_A]->(c:Cluster)
+        WHERE c.id IS NOT NULL
+        RETURN i.id AS item, c.id AS cluster
+        """)
+        return {row["item"]: row["cluster"] for row in rows}
+
+    def _start_pass(self) -> Any:
+        """Marca o início da execução e retorna a marca d'água anterior (ou None)"""
+        rows = self.graph.query("""
+        MERGE (e:Estado {nome: $nome})
+        SET e.iniciado_em = datetime()
+        RETURN e.processado_ate AS desde
+        """, {"nome": WATERMARK_NAME})
+        return rows[0]["desde"] if rows else None
+
+    def _finish_pass(self) -> None:
+        """Avança a marca d'água para o início da execução"""
+        self.graph.query("""
+        MATCH (e:Estado {nome: $nome})
+        SET e.processado_ate = e.iniciado_em
+        """, {"nome": WATERMARK_NAME})
@@ -0,0 +1,170 @@
+"""Classificação determinística por extensão, caminho e conteúdo, sem LLM"""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Confiança mínima para dispensar o LLM
+DEFAULT_CONFIDENCE_THRESHOLD = 0.85
+
+# Tipos aceitos pelo prompt de classificação (usados no front matter)
+KNOWN_TYPES = frozenset({
+    "projeto", "nota", "prompt", "insight", "anotacao", "documentacao", "ideia",
+    "tutorial", "codigo", "artigo", "receita", "outro",
+})
+
+# Extensão -> (linguagem, confiança)
+CODE_EXTENSIONS = {
+    ".py": ("Python", 0.95),
+    ".js": ("JavaScript", 0.95),
+    ".ts": ("TypeScript", 0.95),
+    ".sql": ("SQL", 0.95),
+    ".sh": ("Shell", 0.95),
+    ".bash": ("Shell", 0.95),
+    ".css": ("CSS", 0.9),
+    ".html": ("HTML", 0.6),  # páginas salvas costumam ser artigos
+}
+
+# Extensão -> (formato, confiança)
+CONFIG_EXTENSIONS = {
+    ".yaml": ("YAML", 0.9),
+    ".yml": ("YAML", 0.9),
+    ".toml": ("TOML", 0.9),
+    ".ini": ("INI", 0.9),
+    ".conf": ("Configuração", 0.9),
+    ".env": ("dotenv", 0.95),
+    ".gitignore": ("Git", 0.95),
+    ".dockerfile": ("Docker", 0.95),
+}
+
+# Arquivos de manifesto/configuração conhecidos pelo nome
+CONFIG_FILENAMES = {
+    "package.json": "Node.js",
+    "tsconfig.json": "TypeScript",
+    "composer.json": "PHP",
+    "dockerfile": "Docker",
+    "docker-compose.yml": "Docker Compose",
+    "docker-compose.yaml": "Docker Compose",
+    "pyproject.toml": "Python",
+    "requirements.txt": "Python",
+    "makefile": "Make",
+}
+
+# Prefixo do nome -> subtipo de documentação
+DOC_FILENAME_PREFIXES = {
+    "README": "readme",
+    "CHANGELOG": "changelog",
+    "CONTRIBUTING": "guia_de_contribuicao",
+    "LICENSE": "licenca",
+    "INSTALL": "instalacao",
+}
+
+DOC_DIRS = frozenset({"docs", "doc", "documentation", "documentacao", "wiki"})
+
+_FRONT_MATTER_TYPE = re.compile(
+    r"\A---\s*\n(?:.*\n)*?(?:tipo|type)\s*:\s*[\"']?(\w+)[\"']?\s*\n(?:.*\n)*?---", re.IGNORECASE
+)
+_SHEBANG = re.compile(r"\A#!\s*(?:\S*/)?(?:env\s+)?(python|node|bash|sh|zsh)")
+_K8S_MANIFEST = re.compile(r"^apiVersion:\s*\S+.*^kind:\s*\w+", re.MULTILINE | re.DOTALL)
+
+
+def _result(tipo: str, subtipo: Optional[str], file_path: Path,
+            tecnologias: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """Monta uma classificação no mesmo formato da resposta do LLM"""
+    suffix = file_path.suffix.lower().lstrip(".")
+    return {
+        "tipo_primario": tipo,
+        "subtipo": subtipo,
+        "topicos": [],
+        "conceitos": [],
+        "tecnologias": list(tecnologias),
+        "tags": [suffix] if suffix else [],
+        "status": None,
+        "maturidade": None,
+        "data_estimada": None,
+        "contexto": None,
+    }
+
+
+def classify_by_rules(file_path: Path, content: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Classifica um arquivo por regras, retornando também a confiança da regra
+
+    As regras são avaliadas da mais específica para a mais genérica: tipo
+    declarado no front matter, shebang, nomes de arquivo conhecidos, pastas
+    de documentação e, por fim, a extensão.
+
+    Args:
+        file_path: Caminho do arquivo
+        content: Conteúdo (ou o início dele)
+
+    Returns:
+        Tupla (classificação, confiança); (None, 0.0) se nenhuma regra se aplica
+    """
+    name = file_path.name.lower()
+    suffix = file_path.suffix.lower()
+    parts = {p.lower() for p in file_path.parts[:-1]}
+
+    # Tipo declarado explicitamente pelo autor
+    head = content[:2000]
+    match = _FRONT_MATTER_TYPE.match(head)
+    if match and match.group(1).lower() in KNOWN_TYPES:
+        return _result(match.group(1).lower(), None, file_path), 0.95
+
+    match = _SHEBANG.match(head)
+    if match:
+        language = "Python" if match.group(1) == "python" else (
+            "JavaScript" if match.group(1) == "node" else "Shell")
+        return _result("codigo", "script", file_path, (language,)), 0.95
+
+    if name in CONFIG_FILENAMES:
+        return _result("codigo", "configuracao", file_path, (CONFIG_FILENAMES[name],)), 0.95
+
+    upper_name = file_path.name.upper()
+    for prefix, subtipo in DOC_FILENAME_PREFIXES.items():
+        if upper_name.startswith(prefix):
+            return _result("documentacao", subtipo, file_path), 0.95
+
+    if suffix in CODE_EXTENSIONS:
+        language, confidence = CODE_EXTENSIONS[suffix]
+        if suffix == ".html" and "<script" in head.lower():
+            confidence = 0.9
+        return _result("codigo", None, file_path, (language,)), confidence
+
+    if suffix in CONFIG_EXTENSIONS:
+        fmt, confidence = CONFIG_EXTENSIONS[suffix]
+        tecnologias = [fmt]
+        if ".github" in parts and "workflows" in parts:
+            tecnologias.append("GitHub Actions")
+        elif suffix in (".yaml", ".yml") and _K8S_MANIFEST.search(head):
+            tecnologias.append("Kubernetes")
+        return _result("codigo", "configuracao", file_path, tuple(tecnologias)), confidence
+
+    if suffix == ".rst" or (suffix == ".md" and parts & DOC_DIRS):
+        return _result("documentacao", None, file_path), 0.85 if suffix == ".md" else 0.9
+
+    if suffix == ".log":
+        return _result("outro", "log", file_path), 0.95
+    if suffix == ".csv":
+        return _result("outro", "dados", file_path), 0.9
+
+    return None, 0.0
+
+
+def fast_classify(file_path: Path, content: str,
+                  threshold: float = DEFAULT_CONFIDENCE_THRESHOLD) -> Optional[Dict[str, Any]]:
+    """
+    Retorna a classificação por regras se ela atingir o limiar de confiança
+
+    Args:
+        file_path: Caminho do arquivo
+        content: Conteúdo (ou o início dele)
+        threshold: Confiança mínima (0 a 1)
+
+    Returns:
+        Classificação pronta, ou None se o arquivo deve ir para o LLM
+    """
+    classification, confidence = classify_by_rules(file_path, content)
+    if classification is None or confidence < threshold:
+        return None
+    return classification
@@ -1,16 +1,171 @@
 """Ingestão de conhecimento para o grafo"""
 
-import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from datetime import datetime
 
 from langchain_core.prompts import ChatPromptTemplate
 
-from src.config import get_graph
+from src.config import get_graph, get_token_budget, is_ann_index_enabled
+from src.knowledge_system.fast_classifier import DEFAULT_CONFIDENCE_THRESHOLD, fast_classify
+from src.shared.chunking import hash_file, iter_file_chunks
 from src.shared.embeddings import EmbeddingManager
-from src.shared.llm import LLMConfig
-from src.shared.utils import generate_hash, read_file_content, is_text_file
+from src.shared.journal import RunJournal, STAGE_ENRICHED, STAGE_READ, STAGE_WRITTEN
+from src.shared.llm import LLMConfig, get_model_name, parse_json_response
+from src.shared.llm_cache import LLMCache
+from src.shared.manifest import FileManifest
+from src.shared.metrics import RunStats
+from src.shared.prompting import build_salient_excerpt
+from src.shared.rate_limit import get_rate_limiter
+from src.shared.sketches import SketchIndex, minhash_signature
+from src.shared.utils import (
+    count_tokens, generate_hash, read_file_content, is_text_file, iter_batches
+)
+from src.shared.tech_extractor import extract_technologies
+from src.shared.walker import walk_files
+
+
+# Caracteres do conteúdo guardados em Item.conteudo
+ITEM_CONTENT_LENGTH = 15000
+
+# Versão do prompt de classificação (altere ao mudar o prompt para invalidar o cache)
+CLASSIFICATION_PROMPT_VERSION = "classificacao-v2"
+
+# Versão do prompt em lote: respostas dele ficam no cache sob a própria chave,
+# sem se misturar às do prompt individual
+BATCH_CLASSIFICATION_PROMPT_VERSION = "classificacao-lote-v1"
+
+# Upsert do Item com tópicos, conceitos, tecnologias e tags em uma única query
+ITEM_UPSERT_QUERY = """
+UNWIND $items AS item
+MERGE (i:Item {id: item.id})
+SET i.nome = item.nome,
+    i.path = item.path,
+    i.paths = CASE WHEN item.path IN coalesce(i.paths, []) THEN i.paths
+                   ELSE coalesce(i.paths, []) + item.path END,
+    i.tipo = item.tipo,
+    i.subtipo = item.subtipo,
+    i.status = item.status,
+    i.maturidade = item.maturidade,
+    i.contexto = item.contexto,
+    i.conteudo = item.conteudo,
+    i.embedding = item.embedding,
+    i.hash = item.hash,
+    i.tamanho = item.tamanho,
+    i.modificado = item.modificado,
+    i.modificado_em = datetime(item.modificado),
+    i.processado_em = datetime()
+FOREACH (nome IN item.topicos |
+    MERGE (t:Topico {nome: nome})
+    MERGE (i)-[:SOBRE]->(t))
+FOREACH (nome IN item.conceitos |
+    MERGE (c:Conceito {nome: nome})
+    MERGE (i)-[:MENCIONA]->(c))
+FOREACH (nome IN item.tecnologias |
+    MERGE (t:Tecnologia {nome: nome})
+    MERGE (i)-[:USA_TECNOLOGIA]->(t))
+FOREACH (nome IN item.tags |
+    MERGE (tg:Tag {nome: nome})
+    MERGE (i)-[:TAG]->(tg))
+WITH i, item
+CALL {
+    WITH i, item
+    UNWIND item.quase_duplicados AS dup
+    MATCH (d:Item {id: dup.id})
+    MERGE (i)-[r:QUASE_DUPLICADO]->(d)
+    SET r.similaridade = dup.similaridade
+}
+"""
+
+
+# Arquivos com conteúdo idêntico a um Item já gravado: só registra o caminho
+ALIAS_UPSERT_QUERY = """
+UNWIND $aliases AS alias
+MATCH (i:Item {id: alias.id})
+SET i.paths = CASE WHEN alias.path IN coalesce(i.paths, []) THEN i.paths
+                   ELSE coalesce(i.paths, []) + alias.path END
+"""
+
+
+# Caminhos que deixaram de pertencer a um Item (arquivo apagado ou com outro
+# conteúdo); i.path passa para o próximo caminho que ainda existe
+PRUNE_PATHS_QUERY = """
+UNWIND $obsoletos AS obsoleto
+MATCH (i:Item {id: obsoleto.id})
+WITH i, [p IN coalesce(i.paths, []) WHERE NOT p IN obsoleto.paths] AS paths
+SET i.nome = CASE WHEN i.path IN paths OR size(paths) = 0 THEN i.nome
+                  ELSE last(split(replace(head(paths), '\\\\', '/'), '/')) END,
+    i.path = CASE WHEN i.path IN paths THEN i.path ELSE head(paths) END,
+    i.paths = paths
+"""
+
+
+# Items e caminhos alternativos de um lote numa única query, ou seja, numa única
+# transação: ou o lote inteiro é gravado, ou nada dele. Caminhos obsoletos saem
+# antes, e os itens são gravados antes dos caminhos alternativos
+WRITE_ITEMS_QUERY = f"""
+CALL {{
+{PRUNE_PATHS_QUERY.strip()}
+}}
+CALL {{
+{ITEM_UPSERT_QUERY.strip()}
+}}
+CALL {{
+{ALIAS_UPSERT_QUERY.strip()}
+}}
+"""
+
+
+# Chunks de um Item; o MERGE no Item permite gravar os chunks antes do próprio Item
+CHUNK_UPSERT_QUERY = """
+UNWIND $chunks AS chunk
+MERGE (i:Item {id: chunk.item_id})
+MERGE (c:Chunk {id: chunk.id})
+SET c.ordem = chunk.ordem,
+    c.inicio = chunk.inicio,
+    c.texto = chunk.texto,
+    c.embedding = chunk.embedding
+MERGE (i)-[:TEM_CHUNK]->(c)
+"""
+
+
+# Similaridade de Jaccard estimada (MinHash) a partir da qual dois textos são quase duplicatas
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Classificação em lote de arquivos curtos
+SHORT_DOC_MAX_BYTES = 2000
+CLASSIFICATION_BATCH_MAX_DOCS = 10
+CLASSIFICATION_BATCH_TOKENS = 3000
+
+# Mesmo esquema do prompt individual; cache sob BATCH_CLASSIFICATION_PROMPT_VERSION
+BATCH_CLASSIFICATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Você é um classificador de conhecimento pessoal.
+
+    Você receberá vários documentos, cada um iniciado por "### Documento N".
+    Classifique CADA documento e retorne APENAS um array JSON, um objeto por documento:
+    [
+      {{
+        "id": "N (número do documento)",
+        "tipo_primario": "projeto | nota | prompt | insight | anotacao | documentacao | ideia | tutorial | codigo | artigo | receita | outro",
+        "subtipo": "descrição mais específica se aplicável",
+        "topicos": ["listar tópicos principais"],
+        "conceitos": ["conceitos técnicos ou abstratos mencionados"],
+        "tecnologias": ["tecnologias mencionadas se aplicável"],
+        "tags": ["tags/palavras-chave úteis"],
+        "status": "rascunho | em_andamento | completo | arquivado | abandonado",
+        "maturidade": "ideia_inicial | exploracao | desenvolvimento | producao",
+        "data_estimada": "tente inferir quando foi criado pelo conteúdo",
+        "contexto": "breve descrição do que é e por que existe"
+      }}
+    ]
+
+    Seja preciso. Use null se incerto.
+    """),
+    ("user", "{documentos}")
+])
 
 
 class Ingestion:
@@ -20,13 +175,71 @@ class Ingestion:
         self.graph = get_graph()
         self.embedding_manager = EmbeddingManager()
         self.llm = LLMConfig.classification_llm()
+        self.manifest = FileManifest()
+        self.llm_cache = LLMCache()
+        self.rate_limiter = get_rate_limiter("llm")
+        self.journal = RunJournal()
+        self.stats = RunStats()
+        self._chunking: Optional[Tuple[int, int]] = None
+        self._batch_classification = False
+        self._fast_threshold: Optional[float] = None
+        self._write_batch_size = 1
+        self._write_buffer: List[Tuple[Path, Dict[str, Any]]] = []
+        self._incremental = True
+        self._seen_hashes: Dict[str, str] = {}
+        self._dedup_lock = threading.Lock()
+        # Caminhos alternativos esperam o Item dono ser gravado (ver _queue_alias)
+        self._owners: Dict[str, str] = {}
+        self._written_hashes: set = set()
+        self._parked_aliases: Dict[str, List[Tuple[Path, Dict[str, Any]]]] = {}
+        self._requeue: List[Path] = []
+        self._discovered: set = set()
+        self.sketches = SketchIndex()
+        self._near_duplicate_threshold: Optional[float] = None
+        self._reuse_similar = False
+        self.ann_index = None
 
-    def ingest_directory(self, root_path: str) -> int:
+    def ingest_directory(self, root_path: str, workers: int = 4,
+                         batch_embeddings: bool = False, write_batch_size: int = 1,
+                         incremental: bool = True, chunking: bool = False,
+                         chunk_size: int = 2000, chunk_overlap: int = 200,
+                         resume: bool = False, batch_classification: bool = False,
+                         fast_classification: bool = True, near_duplicates: bool = True,
+                         reuse_similar: bool = False, ann_index: Optional[bool] = None) -> int:
         """
         Ingere todos os arquivos de texto de um diretório
 
+        Os arquivos são processados em paralelo por um pool de threads, mantendo
+        várias chamadas de embedding e classificação em andamento ao mesmo tempo.
+
         Args:
             root_path: Caminho do diretório raiz
+            workers: Número de arquivos processados simultaneamente
+            batch_embeddings: Se True, agrupa documentos de vários arquivos em
+                lotes para embed_documents (tamanho definido pelo provedor)
+            write_batch_size: Número de arquivos gravados por transação; acima de
+                1 os itens enriquecidos são acumulados e gravados num único UNWIND
+            incremental: Se True, pula arquivos com mtime e tamanho iguais aos
+                registrados no manifesto local e não reenriquece conteúdos que
+                já têm Item no grafo (use False após limpar o grafo)
+            chunking: Se True, divide cada arquivo em chunks sobrepostos (nós
+                Chunk ligados ao Item, com embedding próprio), lidos em streaming
+            chunk_size: Tamanho de cada chunk em caracteres
+            chunk_overlap: Sobreposição entre chunks consecutivos
+            resume: Se True, retoma a última execução interrompida sobre o mesmo
+                diretório, pulando os arquivos que ela já gravou
+            batch_classification: Se True, arquivos curtos são classificados em
+                grupo, vários documentos por chamada ao LLM
+            fast_classification: Se True, arquivos de tipo óbvio (código,
+                configuração, README...) são classificados por regras, sem LLM;
+                a confiança mínima vem de FAST_CLASSIFICATION_THRESHOLD
+            near_duplicates: Se True, mantém o índice local de assinaturas
+                MinHash e liga textos quase idênticos com QUASE_DUPLICADO
+                (limiar em NEAR_DUPLICATE_THRESHOLD)
+            reuse_similar: Se True, um arquivo quase idêntico a outro já
+                classificado reaproveita a classificação dele, sem chamar o LLM
+            ann_index: Se True, espelha os embeddings gravados no índice ANN
+                local (padrão: variável ANN_INDEX)
 
         Returns:
             Número de itens ingeridos
@@ -38,67 +251,536 @@ class Ingestion:
         print(f"🧠 Ingerindo conhecimento de: {root_path}")
         print("=" * 60)
 
-        # Encontrar todos os arquivos de texto
-        all_files = []
-        for file_path in root.rglob("*"):
-            if file_path.is_file() and is_text_file(file_path):
-                all_files.append(file_path)
+        self.stats = RunStats()
+        self.journal.open_run("ingest", str(root.resolve()), resume=resume)
+        if resume:
+            print(f"↩️ Retomando execução anterior: {self.journal.resumed_count} arquivos já gravados")
+        self._chunking = (chunk_size, chunk_overlap) if chunking else None
+        if chunking:
+            self.create_chunk_index()
+        self._write_batch_size = max(1, write_batch_size)
+        self._write_buffer = []
+        self._incremental = incremental
+        self._seen_hashes = {}
+        self._owners = {}
+        self._written_hashes = set()
+        self._parked_aliases = {}
+        self._requeue = []
+        self._discovered = set()
+        self._near_duplicate_threshold = (
+            float(os.getenv("NEAR_DUPLICATE_THRESHOLD", NEAR_DUPLICATE_THRESHOLD))
+            if near_duplicates else None
+        )
+        self._reuse_similar = near_duplicates and reuse_similar
+        self.ann_index = None
+        if ann_index if ann_index is not None else is_ann_index_enabled():
+            from src.shared.ann import get_item_index
+            self.ann_index = get_item_index()
+        self._batch_classification = batch_classification
+        self._fast_threshold = (
+            float(os.getenv("FAST_CLASSIFICATION_THRESHOLD", DEFAULT_CONFIDENCE_THRESHOLD))
+            if fast_classification else None
+        )
+        max_pending = max(1, workers) * 4
+        pending: Dict[Future, Union[Path, List[Path]]] = {}
 
-        print(f"📁 Encontrados {len(all_files)} arquivos para processar\n")
+        # Arquivos chegam do walker à medida que são descobertos
+        files = self._discover_files(root, incremental)
+        print(f"📁 Processando arquivos conforme são descobertos ({workers} workers)\n")
 
-        count = 0
-        for idx, file_path in enumerate(all_files, 1):
-            print(f"[{idx}/{len(all_files)}] Processando: {file_path.name}")
-            if self._process_item(file_path):
-                count += 1
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            embed_group: List[Path] = []
+            short_group: List[Path] = []
+
+            def submit_embed_group():
+                group = list(embed_group)
+                pending[executor.submit(self._embed_group, group)] = group
+                embed_group.clear()
 
+            def submit_short_group():
+                group = list(short_group)
+                pending[executor.submit(self._process_short_group, group)] = group
+                short_group.clear()
+
+            def submit_requeued():
+                while self._requeue:
+                    file_path = self._requeue.pop(0)
+                    pending[executor.submit(self._process_item, file_path)] = file_path
+
+            for file_path in files:
+                if batch_classification and self._is_short_file(file_path):
+                    short_group.append(file_path)
+                    if len(short_group) >= CLASSIFICATION_BATCH_MAX_DOCS:
+                        submit_short_group()
+                elif batch_embeddings:
+                    embed_group.append(file_path)
+                    if len(embed_group) >= self.embedding_manager.batch_size:
+                        submit_embed_group()
+                else:
+                    pending[executor.submit(self._process_item, file_path)] = file_path
+
+                while len(pending) >= max_pending:
+                    self._collect_results(pending, executor)
+                submit_requeued()
+
+            if embed_group:
+                submit_embed_group()
+            if short_group:
+                submit_short_group()
+            # A gravação do último lote pode devolver caminhos alternativos para a fila
+            while pending or self._write_buffer or self._requeue:
+                submit_requeued()
+                if pending:
+                    self._collect_results(pending, executor)
+                else:
+                    self._flush_writes()
+        self._prune_missing(root)
+        if self.ann_index is not None:
+            self.ann_index.maybe_train()
+        self.stats.stop()
+
+        if self.stats.get("falhas"):
+            print(f"⚠️ {self.stats.get('falhas')} arquivos falharam; use --resume para reprocessar só eles")
+        else:
+            self.journal.finish()
+
+        count = self.stats.get("ingeridos")
         print(f"\n✅ {count} itens ingeridos no grafo!")
+        summary = f"📁 {self.stats.get('descobertos')} arquivos encontrados"
+        if incremental:
+            summary += f", {self.stats.get('inalterados')} inalterados desde a última ingestão"
+        if resume:
+            summary += f", {self.stats.get('retomados')} já gravados na execução retomada"
+        print(summary)
+        self._report_throughput(workers)
         return count
 
-    def _process_item(self, file_path: Path) -> bool:
+    def _discover_files(self, root: Path, incremental: bool) -> Iterator[Path]:
+        """Produz os arquivos de texto a processar, pulando os inalterados"""
+        for file_path in walk_files(root, file_filter=is_text_file):
+            self.stats.incr("descobertos")
+            self._discovered.add(str(file_path))
+            if self.journal.is_written(str(file_path)):
+                self.stats.incr("retomados")
+                continue
+            if incremental:
+                # O arquivo pode ter sido apagado ou ficado ilegível depois da listagem
+                try:
+                    stat = file_path.stat()
+                except OSError as e:
+                    self.stats.incr("falhas")
+                    print(f"❌ {file_path.name}: {e}")
+                    continue
+                if self.manifest.is_unchanged(str(file_path), stat):
+                    self.stats.incr("inalterados")
+                    continue
+            yield file_path
+
+    def _prune_missing(self, root: Path):
+        """Retira dos Items os caminhos de arquivos apagados desde a última ingestão"""
+        missing: Dict[str, List[str]] = {}
+        for path, item_id in self.manifest.entries_under(str(root)):
+            if path not in self._discovered and not os.path.exists(path):
+                missing.setdefault(item_id, []).append(path)
+        if not missing:
+            return
+
+        obsolete = [{"id": item_id, "paths": paths} for item_id, paths in missing.items()]
+        for batch in iter_batches(obsolete, 1000):
+            self.graph.query(PRUNE_PATHS_QUERY, {"obsoletos": batch})
+        paths = [path for item_paths in missing.values() for path in item_paths]
+        self.manifest.forget(paths)
+        print(f"🗑️ {len(paths)} arquivos apagados desde a última ingestão retirados dos Items")
+
+    def _embed_group(self, group: List[Path]) -> List[Tuple[Path, Optional[Dict[str, Any]],
+                                                            Optional[Exception]]]:
         """
-        Processa um item individual
+        Lê um grupo de arquivos e gera seus embeddings numa única chamada em lote
+
+        Roda num worker; o enriquecimento de cada documento vira uma nova
+        tarefa quando o resultado é coletado (_collect_results).
+
+        Returns:
+            Lista de (arquivo, documento preparado ou None, erro ou None)
+        """
+        outcomes: List[Tuple[Path, Optional[Dict[str, Any]], Optional[Exception]]] = []
+        docs = []
+        for file_path in group:
+            try:
+                doc = self._prepare_item(file_path)
+            except Exception as e:
+                outcomes.append((file_path, None, e))
+                continue
+            if doc:
+                docs.append(doc)
+            else:
+                outcomes.append((file_path, None, None))
+
+        # Duplicatas seguem sem embedding; _process_item só registra o caminho
+        duplicates, unique = [], []
+        for doc in docs:
+            try:
+                (duplicates if self._find_duplicate(doc) else unique).append(doc)
+            except Exception as e:
+                outcomes.append((doc["file_path"], None, e))
+
+        if unique:
+            try:
+                embeddings = self.embedding_manager.embed_texts_batched([d["content"] for d in unique])
+            except Exception as e:
+                outcomes.extend((doc["file_path"], None, e) for doc in unique)
+                unique = []
+            else:
+                for doc, embedding in zip(unique, embeddings):
+                    doc["embedding"] = embedding
+
+        return outcomes + [(doc["file_path"], doc, None) for doc in duplicates + unique]
+
+    def _collect_results(self, pending: Dict[Future, Union[Path, List[Path]]],
+                         executor: ThreadPoolExecutor):
+        """
+        Aguarda ao menos uma tarefa em andamento e registra os arquivos concluídos
+
+        Documentos preparados por _embed_group (com "file_path") ainda não
+        foram enriquecidos e voltam para o executor em _process_item.
+        """
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            task = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                for file_path in (task if isinstance(task, list) else [task]):
+                    self._record_result(file_path, error=e)
+                continue
+
+            # Tarefas de grupo devolvem (arquivo, registro, erro) para cada arquivo
+            outcomes = result if isinstance(task, list) else [(task, result, None)]
+            for file_path, record, error in outcomes:
+                if error is not None:
+                    self._record_result(file_path, error=error)
+                elif record is not None and "file_path" in record:
+                    pending[executor.submit(self._process_item, record)] = file_path
+                elif record is not None and record.get("alias"):
+                    self._queue_alias(file_path, record)
+                elif record is None or self._write_batch_size <= 1:
+                    self._record_result(file_path, ok=record is not None)
+                else:
+                    self._queue_write(file_path, record)
+
+    def _queue_write(self, file_path: Path, record: Dict[str, Any]):
+        """Grava o registro agora, ou no próximo lote se a gravação é em lote"""
+        if self._write_batch_size > 1:
+            self._write_buffer.append((file_path, record))
+            if len(self._write_buffer) >= self._write_batch_size:
+                self._flush_writes()
+            return
+
+        try:
+            self._write_items([record])
+        except Exception as e:
+            self._record_result(file_path, error=e)
+            return
+        self._record_result(file_path, ok=True)
+
+    def _queue_alias(self, file_path: Path, record: Dict[str, Any]):
+        """
+        Grava um caminho alternativo só depois que o Item dono foi gravado
+
+        Enquanto o arquivo dono está em andamento, o caminho fica estacionado
+        e é liberado por _settle_aliases. Se o dono já falhou, este arquivo
+        assume o conteúdo e volta para a fila como um item normal.
+        """
+        content_hash = record["hash"]
+        with self._dedup_lock:
+            owner = self._seen_hashes.get(content_hash)
+            owner_pending = owner in self._owners
+
+        if record["dono"] == "grafo" or content_hash in self._written_hashes:
+            self.stats.incr("duplicados")
+            print(f"  🔁 {file_path.name} → conteúdo idêntico a {record['dono']}")
+            self._queue_write(file_path, record)
+        elif owner_pending:
+            self._parked_aliases.setdefault(content_hash, []).append((file_path, record))
+        else:
+            self._promote_alias(file_path, content_hash)
+
+    def _settle_aliases(self, content_hash: str):
+        """Libera os caminhos alternativos que esperavam o arquivo dono terminar"""
+        parked = self._parked_aliases.pop(content_hash, [])
+        if not parked:
+            return
+        if content_hash in self._written_hashes:
+            for file_path, record in parked:
+                self._queue_alias(file_path, record)
+            return
+
+        # O dono falhou: o primeiro caminho assume o conteúdo, os demais esperam por ele
+        (file_path, _), rest = parked[0], parked[1:]
+        if rest:
+            self._parked_aliases[content_hash] = rest
+        self._promote_alias(file_path, content_hash)
+
+    def _promote_alias(self, file_path: Path, content_hash: str):
+        """Torna o arquivo dono do conteúdo e o devolve para a fila como item normal"""
+        with self._dedup_lock:
+            self._seen_hashes[content_hash] = str(file_path)
+        self._requeue.append(file_path)
+        print(f"  ↩️ {file_path.name}: o arquivo com o mesmo conteúdo falhou, processando este")
+
+    def _flush_writes(self):
+        """Grava os itens acumulados numa única transação"""
+        buffer, self._write_buffer = self._write_buffer, []
+        if not buffer:
+            return
+
+        try:
+            self._write_items([record for _, record in buffer])
+        except Exception as e:
+            for file_path, _ in buffer:
+                self._record_result(file_path, error=e)
+            return
+
+        for file_path, _ in buffer:
+            self._record_result(file_path, ok=True)
+
+    def _record_result(self, file_path: Path, ok: bool = False,
+                       error: Optional[Exception] = None):
+        """Contabiliza e mostra o resultado de um arquivo e libera os caminhos que esperavam por ele"""
+        if error is not None:
+            self.stats.incr("falhas")
+        else:
+            self.stats.incr("ingeridos" if ok else "ignorados")
+
+        idx = sum(self.stats.get(k) for k in ("ingeridos", "ignorados", "falhas"))
+        if error is not None:
+            print(f"[{idx}] ❌ {file_path.name}: {error}")
+        else:
+            print(f"[{idx}] Processado: {file_path.name}")
+
+        with self._dedup_lock:
+            owned_hash = self._owners.pop(str(file_path), None)
+        if owned_hash is not None:
+            self._settle_aliases(owned_hash)
+
+    def _report_throughput(self, workers: int):
+        """Mostra a vazão da execução para dimensionar o número de workers"""
+        stats = self.stats
+        print(f"⏱️ {stats.elapsed:.1f}s com {workers} workers | "
+              f"{stats.throughput('ingeridos'):.2f} itens/s | "
+              f"falhas: {stats.get('falhas')} | ignorados: {stats.get('ignorados')} | "
+              f"cache LLM: {stats.get('llm_cache_hits')} hits")
+        if stats.get("duplicados"):
+            print(f"🔁 {stats.get('duplicados')} arquivos com conteúdo repetido "
+                  f"registrados como caminhos alternativos, sem reenriquecer")
+        if stats.get("quase_duplicados"):
+            print(f"🪞 {stats.get('quase_duplicados')} arquivos quase idênticos a outros "
+                  f"({stats.get('classificacoes_reaproveitadas')} classificações reaproveitadas)")
+        if stats.get("llm_evitadas"):
+            print(f"⚡ {stats.get('llm_evitadas')} arquivos classificados por regras "
+                  f"(chamadas ao LLM evitadas)")
+        if stats.get("llm_chamadas_lote"):
+            print(f"🧠 {stats.get('llm_chamadas')} chamadas ao LLM; {stats.get('llm_chamadas_lote')} "
+                  f"em lote classificaram {stats.get('classificados_em_lote')} arquivos curtos "
+                  f"({stats.get('lote_fallbacks')} fallbacks individuais)")
+        if self.rate_limiter.rate_limited:
+            print(f"⏳ {self.rate_limiter.rate_limited} respostas 429 do LLM; "
+                  f"taxa ajustada para {self.rate_limiter.rate * 60:.0f} req/min")
+        if stats.get("chunks"):
+            print(f"🧩 {stats.get('chunks')} chunks gravados")
+        emb_stats = self.embedding_manager.cache_stats()
+        if emb_stats:
+            print(f"📊 Cache de embeddings: {emb_stats['hits']} hits / {emb_stats['misses']} misses "
+                  f"({emb_stats['hit_rate']:.0%})")
+
+    def _prepare_item(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Lê um arquivo e calcula seus metadados básicos
 
         Args:
             file_path: Caminho do arquivo
 
         Returns:
-            True se processado com sucesso
+            Documento pendente de enriquecimento, ou None se vazio/ilegível
         """
-        content = read_file_content(file_path)
+        # stat antes da leitura: se o arquivo mudar durante a leitura, o
+        # manifesto fica defasado e ele é reprocessado na próxima execução
+        stat = file_path.stat()
+        if self._chunking:
+            # Só o início do arquivo fica em memória; o resto vai em chunks
+            content = read_file_content(file_path, max_length=ITEM_CONTENT_LENGTH)
+            content_hash = hash_file(file_path) if content else None
+        else:
+            content = read_file_content(file_path)
+            content_hash = generate_hash(content) if content else None
         if not content:
-            return False
+            return None
+        self.journal.mark([str(file_path)], STAGE_READ)
 
-        # Metadados do arquivo
-        stat = file_path.stat()
-        content_hash = generate_hash(content)
-        modified = datetime.fromtimestamp(stat.st_mtime)
+        return {
+            "file_path": file_path,
+            "content": content,
+            "hash": content_hash,
+            "tamanho": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "modificado": datetime.fromtimestamp(stat.st_mtime),
+        }
 
-        # Gerar embedding
-        embedding = self.embedding_manager.embed_text(content)
+    def _process_item(self, item: Union[Path, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Processa um item individual
+
+        Args:
+            item: Caminho do arquivo, ou documento já preparado (com
+                embedding pré-calculado no modo em lote)
+
+        Returns:
+            Registro do Item (gravado, ou pendente de gravação em lote), ou
+            None se o arquivo foi ignorado
+        """
+        doc = self._prepare_item(item) if isinstance(item, Path) else item
+        if not doc:
+            return None
+
+        if self._find_duplicate(doc):
+            return self._process_alias(doc)
+
+        file_path = doc["file_path"]
+        content = doc["content"]
+        self._find_near_duplicates(doc)
+
+        # Gerar embedding (se não veio do lote)
+        embedding = doc.get("embedding") or self.embedding_manager.embed_text(content)
 
         # Classificar com LLM
-        classification = self._classify_item(file_path, content)
+        classification = (
+            doc.get("classification")
+            or self._sibling_classification(doc)
+            or self._classify_item(file_path, content, doc["hash"])
+        )
+        self.journal.mark([str(file_path)], STAGE_ENRICHED)
 
-        # Criar nó universal (Item)
-        item_id = content_hash[:16]
-        self.graph.query("""
-        MERGE (i:Item {id: $id})
-        SET i.nome = $nome,
-            i.path = $path,
-            i.tipo = $tipo,
-            i.subtipo = $subtipo,
-            i.status = $status,
-            i.maturidade = $maturidade,
-            i.contexto = $contexto,
-            i.conteudo = $conteudo,
-            i.embedding = $embedding,
-            i.hash = $hash,
-            i.tamanho = $tamanho,
-            i.modificado = $modificado,
-            i.processado_em = datetime()
-        """, {
-            "id": item_id,
+        record = self._build_item_record(doc, embedding, classification)
+        if self._chunking:
+            self._process_chunks(file_path, record["id"])
+        if self._write_batch_size <= 1:
+            self._write_items([record])
+
+        tipo = classification.get('tipo_primario', 'outro')
+        topicos = (classification.get('topicos') or [])[:3]
+        print(f"  📌 {file_path.name} → Tipo: {tipo} | Tópicos: {topicos}")
+
+        return record
+
+    def _find_duplicate(self, doc: Dict[str, Any]) -> Optional[str]:
+        """
+        Verifica se o conteúdo do arquivo já foi (ou está sendo) enriquecido
+
+        O primeiro arquivo de cada hash na execução fica responsável pelo
+        enriquecimento; os demais viram caminhos alternativos do mesmo Item.
+        No modo incremental, conteúdos que já têm Item completo no grafo
+        também não são reprocessados.
+
+        Returns:
+            Caminho do arquivo responsável (ou 'grafo'), ou None se este
+            arquivo deve ser enriquecido
+        """
+        if "duplicate_of" in doc:
+            return doc["duplicate_of"]
+
+        path = str(doc["file_path"])
+        with self._dedup_lock:
+            owner = self._seen_hashes.setdefault(doc["hash"], path)
+            if owner == path:
+                self._owners[path] = doc["hash"]
+        duplicate = owner if owner != path else None
+
+        if duplicate is None and self._incremental:
+            result = self.graph.query("""
+            MATCH (i:Item {id: $id}) WHERE i.embedding IS NOT NULL
+            RETURN count(i) AS total
+            """, {"id": doc["hash"][:16]})
+            if result and result[0]["total"]:
+                duplicate = "grafo"
+
+        doc["duplicate_of"] = duplicate
+        return duplicate
+
+    def _find_near_duplicates(self, doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Procura Items quase idênticos no índice de assinaturas
+
+        A assinatura fica no documento e só entra no índice depois que o Item
+        é gravado (_write_items), para não apontar para Items inexistentes.
+
+        Returns:
+            Lista de {id, hash, similaridade}, do mais similar para o menos
+        """
+        if self._near_duplicate_threshold is None:
+            return []
+        if "quase_duplicados" in doc:
+            return doc["quase_duplicados"]
+
+        item_id = doc["hash"][:16]
+        signature = minhash_signature(doc["content"])
+        matches = self.sketches.query(signature, self._near_duplicate_threshold,
+                                      exclude=[item_id], path=str(doc["file_path"]))
+        doc["assinatura"] = signature
+
+        doc["quase_duplicados"] = [
+            {"id": match_id, "hash": match_hash, "similaridade": round(similarity, 3)}
+            for match_id, match_hash, similarity in matches
+        ]
+        if matches:
+            self.stats.incr("quase_duplicados")
+        return doc["quase_duplicados"]
+
+    def _sibling_classification(self, doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Classificação em cache do Item quase idêntico mais próximo, se habilitado"""
+        if not self._reuse_similar:
+            return None
+        model_name = get_model_name(self.llm)
+        for sibling in self._find_near_duplicates(doc):
+            cached = self._cached_classification(sibling["hash"], model_name)
+            if cached is not None:
+                self.stats.incr("classificacoes_reaproveitadas")
+                return cached
+        return None
+
+    def _process_alias(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Monta o registro de um arquivo duplicado como caminho alternativo do Item existente
+
+        A gravação fica com _queue_alias, que espera o Item dono ser gravado.
+        """
+        return {
+            "id": doc["hash"][:16],
+            "path": str(doc["file_path"]),
+            "hash": doc["hash"],
+            "tamanho": doc["tamanho"],
+            "mtime_ns": doc["mtime_ns"],
+            "alias": True,
+            "dono": doc["duplicate_of"],
+        }
+
+    def _build_item_record(self, doc: Dict[str, Any], embedding: List[float],
+                           classification: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta os parâmetros do Item e de suas relações para ITEM_UPSERT_QUERY"""
+        def names(key: str) -> List[str]:
+            return [str(v) for v in (classification.get(key) or []) if v]
+
+        file_path = doc["file_path"]
+
+        # Tecnologias extraídas dos imports/manifesto somam-se às do classificador
+        tecnologias = names('tecnologias')
+        known = {t.lower() for t in tecnologias}
+        for technology in extract_technologies(file_path, doc["content"]):
+            if technology.lower() not in known:
+                tecnologias.append(technology)
+                known.add(technology.lower())
+
+        return {
+            "id": doc["hash"][:16],
             "nome": file_path.name,
             "path": str(file_path),
             "tipo": classification.get('tipo_primario', 'outro'),
@@ -106,34 +788,301 @@ class Ingestion:
             "status": classification.get('status'),
             "maturidade": classification.get('maturidade'),
             "contexto": classification.get('contexto'),
-            "conteudo": content[:15000],
+            "conteudo": doc["content"][:ITEM_CONTENT_LENGTH],
             "embedding": embedding,
-            "hash": content_hash,
-            "tamanho": stat.st_size,
-            "modificado": modified.isoformat()
+            "hash": doc["hash"],
+            "tamanho": doc["tamanho"],
+            "modificado": doc["modificado"].isoformat(),
+            "mtime_ns": doc["mtime_ns"],
+            "topicos": names('topicos'),
+            "conceitos": names('conceitos'),
+            "tecnologias": tecnologias,
+            "tags": names('tags'),
+            "quase_duplicados": [
+                {"id": dup["id"], "similaridade": dup["similaridade"]}
+                for dup in doc.get("quase_duplicados", [])
+            ],
+            "assinatura": doc.get("assinatura"),
+        }
+
+    def _process_chunks(self, file_path: Path, item_id: str) -> int:
+        """
+        Divide o arquivo em chunks, gera seus embeddings e grava como nós Chunk
+
+        O arquivo é lido em streaming; cada lote de chunks é embedado e gravado
+        antes de ler o próximo.
+
+        Returns:
+            Número de chunks gravados
+        """
+        chunk_size, overlap = self._chunking
+        chunks = iter_file_chunks(file_path, chunk_size=chunk_size, overlap=overlap)
+        count = 0
+        for group in iter_batches(chunks, self.embedding_manager.batch_size):
+            embeddings = self.embedding_manager.embed_texts_batched(
+                [texto for _, texto in group], max_length=chunk_size
+            )
+            records = [
+                {
+                    "id": f"{item_id}:{count + idx}",
+                    "item_id": item_id,
+                    "ordem": count + idx,
+                    "inicio": inicio,
+                    "texto": texto,
+                    "embedding": embedding,
+                }
+                for idx, ((inicio, texto), embedding) in enumerate(zip(group, embeddings))
+            ]
+            self.graph.query(CHUNK_UPSERT_QUERY, {"chunks": records})
+            count += len(records)
+
+        # Remover chunks excedentes de uma ingestão anterior com outro tamanho
+        self.graph.query("""
+        MATCH (:Item {id: $item_id})-[:TEM_CHUNK]->(c:Chunk)
+        WHERE c.ordem >= $total
+        DETACH DELETE c
+        """, {"item_id": item_id, "total": count})
+        self.stats.incr("chunks", count)
+        return count
+
+    def create_chunk_index(self, index_name: str = "chunks_similares") -> None:
+        """Cria índice vetorial sobre os embeddings dos chunks"""
+        self.graph.query(f"""
+        CREATE VECTOR INDEX {index_name} IF NOT EXISTS
+        FOR (c:Chunk)
+        ON c.embedding
+        OPTIONS {{indexConfig: {{
+          `vector.dimensions`: 1536,
+          `vector.similarity_function`: 'cosine'
+        }}}}
+        """)
+
+    def _write_items(self, records: List[Dict[str, Any]]):
+        """
+        Grava Items, caminhos alternativos e todas as suas relações com uma única query
+
+        A query roda numa transação só; manifesto, journal e índices locais
+        são atualizados depois que ela é confirmada.
+        """
+        items = [r for r in records if not r.get("alias")]
+        aliases = [r for r in records if r.get("alias")]
+
+        # Caminhos que antes apontavam para outro conteúdo saem do Item antigo
+        previous = self.manifest.item_ids(r["path"] for r in records)
+        stale: Dict[str, List[str]] = {}
+        for r in records:
+            old_id = previous.get(r["path"])
+            if old_id and old_id != r["id"]:
+                stale.setdefault(old_id, []).append(r["path"])
+
+        self.graph.query(WRITE_ITEMS_QUERY, {
+            "obsoletos": [{"id": item_id, "paths": paths} for item_id, paths in stale.items()],
+            "items": items,
+            "aliases": aliases,
         })
+        self._written_hashes.update(r["hash"] for r in records)
+        if self.ann_index is not None and items:
+            self.ann_index.add_many((r["id"], r["embedding"]) for r in items)
+        for r in items:
+            if r.get("assinatura"):
+                self.sketches.add(r["id"], r["hash"], r["path"], r["assinatura"])
+        self.manifest.record_many(records)
+        self.journal.mark([r["path"] for r in records], STAGE_WRITTEN)
 
-        # Criar relacionamentos
-        self._create_relationships(item_id, classification)
+    def _is_short_file(self, file_path: Path) -> bool:
+        """Arquivos pequenos o bastante para classificação em grupo"""
+        try:
+            return file_path.stat().st_size <= SHORT_DOC_MAX_BYTES
+        except OSError:
+            return False
 
-        tipo = classification.get('tipo_primario', 'outro')
-        topicos = classification.get('topicos', [])[:3]
-        print(f"  📌 Tipo: {tipo} | Tópicos: {topicos}")
-        print(f"  ✅ Item catalogado no grafo\n")
+    def _process_short_group(self, paths: List[Path]) -> List[Tuple[Path, Optional[Dict[str, Any]],
+                                                                     Optional[Exception]]]:
+        """
+        Processa um grupo de arquivos curtos com classificação e embeddings em lote
+
+        Returns:
+            Lista de (arquivo, registro ou None, erro ou None)
+        """
+        outcomes: List[Tuple[Path, Optional[Dict[str, Any]], Optional[Exception]]] = []
+        docs = []
+        for file_path in paths:
+            try:
+                doc = self._prepare_item(file_path)
+                if doc and self._find_duplicate(doc):
+                    outcomes.append((file_path, self._process_alias(doc), None))
+                    continue
+            except Exception as e:
+                outcomes.append((file_path, None, e))
+                continue
+            if doc:
+                docs.append(doc)
+            else:
+                outcomes.append((file_path, None, None))
+
+        if not docs:
+            return outcomes
+
+        try:
+            classifications = self._classify_batch(docs)
+            embeddings = self.embedding_manager.embed_texts_batched([d["content"] for d in docs])
+        except Exception as e:
+            return outcomes + [(doc["file_path"], None, e) for doc in docs]
+
+        for doc, classification, embedding in zip(docs, classifications, embeddings):
+            if isinstance(classification, Exception):
+                outcomes.append((doc["file_path"], None, classification))
+                continue
+            doc["classification"] = classification
+            doc["embedding"] = embedding
+            try:
+                outcomes.append((doc["file_path"], self._process_item(doc), None))
+            except Exception as e:
+                outcomes.append((doc["file_path"], None, e))
+        return outcomes
+
+    def _classify_batch(self, docs: List[Dict[str, Any]]) -> List[Union[Dict[str, Any],
+                                                                        Exception]]:
+        """
+        Classifica vários documentos curtos por chamada ao LLM
+
+        Os documentos são agrupados até CLASSIFICATION_BATCH_TOKENS tokens de
+        conteúdo por prompt. Documentos ausentes ou inválidos na resposta (ou
+        lotes cuja chamada falha ou cuja resposta não é um JSON válido) são
+        classificados um a um.
+
+        Returns:
+            Classificações alinhadas com `docs`; o erro no lugar da
+            classificação quando também a chamada individual falha
+        """
+        model_name = get_model_name(self.llm)
+        results: List[Any] = [None] * len(docs)
+
+        # Aproveitar o cache antes de montar os lotes
+        pending: List[int] = []
+        for idx, doc in enumerate(docs):
+            fast = (self._fast_classify(doc["file_path"], doc["content"])
+                    or self._sibling_classification(doc))
+            if fast is not None:
+                results[idx] = fast
+                continue
+            cached = self._cached_classification(doc["hash"], model_name)
+            if cached is not None:
+                self.stats.incr("llm_cache_hits")
+                results[idx] = cached
+            else:
+                pending.append(idx)
+
+        batch: List[int] = []
+        batch_tokens = 0
+        for idx in pending + [None]:
+            if idx is not None:
+                tokens = count_tokens(docs[idx]["content"])
+                if not batch or (batch_tokens + tokens <= CLASSIFICATION_BATCH_TOKENS
+                                 and len(batch) < CLASSIFICATION_BATCH_MAX_DOCS):
+                    batch.append(idx)
+                    batch_tokens += tokens
+                    continue
+            if batch:
+                parsed = self._invoke_batch_prompt([docs[i] for i in batch])
+                for n, i in enumerate(batch, 1):
+                    results[i] = parsed.get(str(n))
+                    if results[i] is not None:
+                        self.llm_cache.put(docs[i]["hash"], BATCH_CLASSIFICATION_PROMPT_VERSION,
+                                           model_name, results[i])
+            batch = [idx] if idx is not None else []
+            batch_tokens = tokens if idx is not None else 0
+
+        # Fallback individual para o que o lote não resolveu; um erro aqui só
+        # afeta o próprio arquivo
+        for idx, doc in enumerate(docs):
+            if results[idx] is None:
+                self.stats.incr("lote_fallbacks")
+                try:
+                    results[idx] = self._classify_item(doc["file_path"], doc["content"],
+                                                       doc["hash"])
+                except Exception as e:
+                    results[idx] = e
+        return results
+
+    def _cached_classification(self, content_hash: str,
+                               model_name: str) -> Optional[Dict[str, Any]]:
+        """Classificação em cache, do prompt individual ou, na falta dela, do prompt em lote"""
+        for version in (CLASSIFICATION_PROMPT_VERSION, BATCH_CLASSIFICATION_PROMPT_VERSION):
+            cached = self.llm_cache.get(content_hash, version, model_name)
+            if cached is not None:
+                return cached
+        return None
+
+    def _invoke_batch_prompt(self, docs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Envia um lote de documentos numa única chamada; retorna classificações por id"""
+        documentos = "\n\n".join(
+            f"### Documento {n}\nArquivo: {doc['file_path'].name}\n"
+            f"Caminho: {doc['file_path']}\n\nConteúdo:\n{doc['content']}"
+            for n, doc in enumerate(docs, 1)
+        )
+        chain = BATCH_CLASSIFICATION_PROMPT | self.llm
+        try:
+            result = self.rate_limiter.call(chain.invoke, {"documentos": documentos})
+        except Exception as e:
+            # Timeout, erro do provedor ou 429 persistente: os documentos do
+            # lote seguem para a classificação individual
+            print(f"  ⚠️ Falha na chamada em lote ({e}), classificando individualmente")
+            return {}
+        self.stats.incr("llm_chamadas")
+        self.stats.incr("llm_chamadas_lote")
+        self.stats.incr("classificados_em_lote", len(docs))
+
+        try:
+            parsed = parse_json_response(result.content)
+        except (ValueError, TypeError) as e:
+            print(f"  ⚠️ Resposta do lote inválida ({e}), classificando individualmente")
+            return {}
+        if not isinstance(parsed, list):
+            return {}
+        return {
+            str(entry.get("id")): entry
+            for entry in parsed
+            if isinstance(entry, dict) and entry.get("id") is not None
+        }
 
-        return True
+    def _fast_classify(self, file_path: Path, content: str) -> Optional[Dict[str, Any]]:
+        """Classificação por regras, quando habilitada e confiável o bastante"""
+        if self._fast_threshold is None:
+            return None
+        classification = fast_classify(file_path, content, self._fast_threshold)
+        if classification is not None:
+            self.stats.incr("llm_evitadas")
+        return classification
 
-    def _classify_item(self, file_path: Path, content: str) -> Dict[str, Any]:
+    def _classify_item(self, file_path: Path, content: str,
+                       content_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Classifica um item usando LLM
 
+        Arquivos de tipo óbvio são resolvidos antes pelas regras de
+        fast_classifier, sem chamada ao LLM. Respostas válidas ficam no cache local; o mesmo conteúdo não é
+        reclassificado enquanto o prompt e o modelo não mudarem.
+
         Args:
             file_path: Caminho do arquivo
             content: Conteúdo do arquivo
+            content_hash: Hash do conteúdo (calculado se omitido)
 
         Returns:
             Dicionário com classificação
         """
+        fast = self._fast_classify(file_path, content)
+        if fast is not None:
+            return fast
+
+        content_hash = content_hash or generate_hash(content)
+        model_name = get_model_name(self.llm)
+        cached = self.llm_cache.get(content_hash, CLASSIFICATION_PROMPT_VERSION, model_name)
+        if cached is not None:
+            self.stats.incr("llm_cache_hits")
+            return cached
+
         stat = file_path.stat()
         modified = datetime.fromtimestamp(stat.st_mtime)
 
@@ -168,57 +1117,25 @@ Conteúdo:
 
         chain = prompt | self.llm
 
+        # Erros de chamada (após as novas tentativas do limitador) propagam: o
+        # arquivo falha e é reprocessado depois, em vez de gravado como 'outro'
+        result = self.rate_limiter.call(chain.invoke, {
+            "nome": file_path.name,
+            "path": str(file_path),
+            "tamanho": stat.st_size,
+            "modificado": modified.strftime("%Y-%m-%d"),
+            "conteudo": build_salient_excerpt(content, get_token_budget("classification"), model_name)
+        })
+        self.stats.incr("llm_chamadas")
+
         try:
-            result = chain.invoke({
-                "nome": file_path.name,
-                "path": str(file_path),
-                "tamanho": stat.st_size,
-                "modificado": modified.strftime("%Y-%m-%d"),
-                "conteudo": content[:6000]
-            })
-            return json.loads(result.content)
-        except Exception as e:
+            classification = parse_json_response(result.content)
+            self.llm_cache.put(content_hash, CLASSIFICATION_PROMPT_VERSION, model_name, classification)
+            return classification
+        except (ValueError, TypeError) as e:
             print(f"  ⚠️ Erro ao parsear classificação: {e}, usando padrão")
             return {
                 "tipo_primario": "outro",
                 "topicos": [],
                 "tags": []
             }
-
-    def _create_relationships(self, item_id: str, classification: Dict[str, Any]):
-        """Cria relacionamentos do item com tópicos, conceitos, tecnologias e tags"""
-        # Tópicos
-        for topico in classification.get('topicos', []):
-            if topico:
-                self.graph.query("""
-                MATCH (i:Item {id: $item_id})
-                MERGE (t:Topico {nome: $topico})
-                MERGE (i)-[:SOBRE]->(t)
-                """, {"item_id": item_id, "topico": topico})
-
-        # Conceitos
-        for conceito in classification.get('conceitos', []):
-            if conceito:
-                self.graph.query("""
-                MATCH (i:Item {id: $item_id})
-                MERGE (c:Conceito {nome: $conceito})
-                MERGE (i)-[:MENCIONA]->(c)
-                """, {"item_id": item_id, "conceito": conceito})
-
-        # Tecnologias
-        for tech in classification.get('tecnologias', []):
-            if tech:
-                self.graph.query("""
-                MATCH (i:Item {id: $item_id})
-                MERGE (t:Tecnologia {nome: $tech})
-                MERGE (i)-[:USA_TECNOLOGIA]->(t)
-                """, {"item_id": item_id, "tech": tech})
-
-        # Tags
-        for tag in classification.get('tags', []):
-            if tag:
-                self.graph.query("""
-                MATCH (i:Item {id: $item_id})
-                MERGE (tg:Tag {nome: $tag})
-                MERGE (i)-[:TAG]->(tg)
-                """, {"item_id": item_id, "tag": tag})
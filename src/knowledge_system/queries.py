@@ -6,6 +6,7 @@ from langchain_neo4j import GraphCypherQAChain
 
 from src.config import get_graph
 from src.shared.llm import LLMConfig
+from src.shared.schema import TOPICS_FULLTEXT_INDEX, ensure_schema_once, fulltext_query
 
 
 class ConversationalInterface:
@@ -65,18 +66,77 @@ class QueryLibrary:
 
     def __init__(self):
         self.graph = get_graph()
+        self._embedding_manager = None
+
+    def show_all_about_topic(self, topic: str, limit: int = 50, cursor: Optional[str] = None,
+                             fuzzy: bool = False) -> List[Dict[str, Any]]:
+        """
+        Mostra os itens sobre um tópico, conceito ou tag, do mais recente para o mais antigo
+
+        A busca usa o índice full-text (sem diferenciar acentos e maiúsculas,
+        cada termo também como prefixo).
+
+        Args:
+            topic: Texto buscado nos nomes de Topico, Conceito e Tag
+            limit: Itens por página
+            cursor: Campo 'cursor' do último item da página anterior
+            fuzzy: Se True, aceita erros de digitação
+
+        Returns:
+            Página de itens; cada um traz o 'cursor' para buscar a seguinte
+        """
+        search = fulltext_query(topic, fuzzy=fuzzy)
+        if not search:
+            return []
+        ensure_schema_once(self.graph)
+        after_date, after_id = cursor.split("|", 1) if cursor else (None, None)
 
-    def show_all_about_topic(self, topic: str) -> List[Dict[str, Any]]:
-        """Mostra todos os itens sobre um tópico específico"""
         results = self.graph.query("""
+        CALL db.index.fulltext.queryNodes($index, $busca) YIELD node AS n
         MATCH (i:Item)-[:SOBRE|MENCIONA|TAG]-(n)
-        WHERE toLower(n.nome) CONTAINS toLower($topic)
-        RETURN i.nome as item,
+        WITH i, head(collect(labels(n)[0])) as encontrado_via
+        WITH i, encontrado_via, coalesce(toString(i.modificado), '') as modificado
+        WHERE $depois_de IS NULL
+           OR modificado < $depois_de
+           OR (modificado = $depois_de AND i.id < $depois_de_id)
+        RETURN i.id as id,
+               i.nome as item,
                i.tipo as tipo,
                i.contexto as descricao,
-               labels(n)[0] as encontrado_via
-        ORDER BY i.modificado DESC
-        """, {"topic": topic})
+               encontrado_via,
+               modificado + '|' + i.id as cursor
+        ORDER BY modificado DESC, i.id DESC
+        LIMIT $limit
+        """, {
+            "index": TOPICS_FULLTEXT_INDEX,
+            "busca": search,
+            "depois_de": after_date,
+            "depois_de_id": after_id,
+            "limit": limit,
+        })
+
+        return results
+
+    def search_chunks(self, text: str, k: int = 10,
+                      index_name: str = "chunks_similares") -> List[Dict[str, Any]]:
+        """Busca os trechos (chunks) mais similares a um texto"""
+        from src.shared.embeddings import EmbeddingManager
+
+        if self._embedding_manager is None:
+            self._embedding_manager = EmbeddingManager()
+        embedding = self._embedding_manager.embed_text(text)
+
+        results = self.graph.query("""
+        CALL db.index.vector.queryNodes($index_name, $k, $embedding)
+        YIELD node, score
+        MATCH (i:Item)-[:TEM_CHUNK]->(node)
+        RETURN i.nome as item,
+               i.path as path,
+               node.ordem as chunk,
+               node.texto as trecho,
+               score
+        ORDER BY score DESC
+        """, {"index_name": index_name, "k": k, "embedding": embedding})
 
         return results
 
@@ -126,14 +186,32 @@ class QueryLibrary:
 
         return results
 
-    def topic_map(self, topic: str, max_depth: int = 2) -> List[Dict[str, Any]]:
-        """Mapa completo de um tópico"""
+    def topic_map(self, topic: str, max_depth: int = 2, limit: int = 50, skip: int = 0,
+                  fuzzy: bool = False) -> List[Dict[str, Any]]:
+        """
+        Mapa completo de um tópico
+
+        Args:
+            topic: Texto buscado nos nomes dos Topicos (índice full-text)
+            max_depth: Saltos máximos entre Item e Topico
+            limit: Caminhos por página
+            skip: Caminhos a pular (página * limit)
+            fuzzy: Se True, aceita erros de digitação
+        """
+        search = fulltext_query(topic, fuzzy=fuzzy)
+        if not search:
+            return []
+        ensure_schema_once(self.graph)
+
         results = self.graph.query(f"""
-        MATCH caminho = (i:Item)-[:SOBRE|MENCIONA*1..{max_depth}]-(t:Topico)
-        WHERE toLower(t.nome) CONTAINS toLower($topic)
+        CALL db.index.fulltext.queryNodes($index, $busca) YIELD node AS t, score
+        WHERE t:Topico
+        MATCH caminho = (i:Item)-[:SOBRE|MENCIONA*1..{int(max_depth)}]-(t)
         RETURN [n IN nodes(caminho) | n.nome] as caminho_nomes
-        LIMIT 50
-        """, {"topic": topic})
+        ORDER BY score DESC, length(caminho), i.id
+        SKIP $skip
+        LIMIT $limit
+        """, {"index": TOPICS_FULLTEXT_INDEX, "busca": search, "skip": skip, "limit": limit})
 
         return results
 
@@ -1,11 +1,74 @@
 """Criação de relacionamentos semânticos no grafo"""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
 
 from langchain_neo4j import Neo4jVector
 
 from src.config import get_graph
+from src.knowledge_system.communities import CommunityDetector
+from src.shared.ann import ann_pairs, get_item_index
 from src.shared.embeddings import EmbeddingManager
+from src.shared.graph_writer import BulkEdgeWriter
+from src.shared.knn import knn_pairs, load_embeddings
+from src.shared.utils import iter_batches
+
+
+# Vizinhos de cada Item buscados no índice vetorial com o embedding já gravado
+STORED_NEIGHBORS_QUERY = """
+UNWIND $ids AS id
+MATCH (i:Item {id: id})
+WHERE i.embedding IS NOT NULL
+CALL db.index.vector.queryNodes($index_name, $k, i.embedding)
+YIELD node, score
+WITH i, node, score
+WHERE node <> i AND score > $threshold
+MERGE (i)-[r:RELACIONADO_A]-(node)
+SET r.score = score,
+    r.descoberto_em = datetime()
+RETURN i.nome AS origem, node.nome AS destino, score
+"""
+
+# Nó que guarda até quando os Items já tiveram a vizinhança calculada
+WATERMARK_NAME = "relacionamentos_semanticos"
+EVOLUTIONS_WATERMARK_NAME = "evolucoes"
+
+# Tipos de origem e destino de uma evolução (ideia/nota/prompt -> projeto/código)
+EVOLUTION_SOURCE_TYPES = ["ideia", "nota", "prompt"]
+EVOLUTION_TARGET_TYPES = ["projeto", "codigo"]
+
+# Items com arestas RELACIONADO_A descobertas ou conteúdo gravado desde a marca
+EVOLUTION_TOUCHED_QUERY = """
+MATCH (a:Item)-[r:RELACIONADO_A]->(b:Item)
+WHERE r.descoberto_em > $desde
+UNWIND [a.id, b.id] AS id
+RETURN DISTINCT id
+UNION
+MATCH (i:Item)
+WHERE i.processado_em > $desde
+RETURN i.id AS id
+"""
+
+# Evoluções envolvendo uma janela de Items, nos dois sentidos da aresta
+EVOLUTION_WINDOW_QUERY = """
+UNWIND $ids AS id
+MATCH (a:Item {id: id})-[r:RELACIONADO_A]-(b:Item)
+WHERE r.score > $min_score
+UNWIND [[a, b], [b, a]] AS par
+WITH par[0] AS i1, par[1] AS i2, r
+WHERE i1.tipo IN $tipos_origem
+  AND i2.tipo IN $tipos_destino
+  AND coalesce(i1.modificado_em, datetime(i1.modificado))
+      < coalesce(i2.modificado_em, datetime(i2.modificado))
+RETURN DISTINCT i1.id AS origem_id,
+       i2.id AS destino_id,
+       i1.nome AS origem,
+       i1.tipo AS tipo_origem,
+       i1.modificado AS data_origem,
+       i2.nome AS destino,
+       i2.tipo AS tipo_destino,
+       i2.modificado AS data_destino,
+       r.score AS similaridade
+"""
 
 
 class RelationshipManager:
@@ -13,7 +76,14 @@ class RelationshipManager:
 
     def __init__(self):
         self.graph = get_graph()
-        self.embedding_manager = EmbeddingManager()
+        self._embedding_manager = None
+
+    @property
+    def embedding_manager(self) -> EmbeddingManager:
+        """Criado só quando um modo precisa gerar embeddings"""
+        if self._embedding_manager is None:
+            self._embedding_manager = EmbeddingManager()
+        return self._embedding_manager
 
     def create_vector_index(self, index_name: str = "itens_similares") -> None:
         """Cria índice vetorial para busca de similaridade"""
@@ -28,13 +98,37 @@ class RelationshipManager:
         """)
 
     def create_semantic_relationships(self, threshold: float = 0.75,
-                                      index_name: str = "itens_similares") -> int:
+                                      index_name: str = "itens_similares",
+                                      engine: Literal["stored", "names", "numpy", "ann"] = "stored",
+                                      k: int = 10, batch_size: int = 200,
+                                      workers: int = 1, memory_mb: int = 512,
+                                      rebuild_ann: bool = False, full: bool = False,
+                                      write_batch_size: int = 1000) -> int:
         """
         Cria relacionamentos RELACIONADO_A baseado em similaridade semântica
 
         Args:
             threshold: Limiar de similaridade (0-1)
             index_name: Nome do índice vetorial
+            engine: 'stored' consulta o índice com o embedding de conteúdo já
+                gravado em cada Item, dentro do banco e sem chamadas à API de
+                embeddings; 'names' gera um embedding de "nome tipo" por Item
+                (comportamento anterior); 'numpy' lê todos os embeddings e
+                calcula o kNN exato localmente (requer o extra [knn]); 'ann'
+                consulta o índice ANN local, sem uma query por Item
+            k: Vizinhos buscados por Item
+            batch_size: Items processados por query no modo 'stored'
+            workers: Processos usados pela engine 'numpy'
+            memory_mb: Memória de trabalho da engine 'numpy' (sem contar a
+                matriz de embeddings, N x d x 4 bytes)
+            rebuild_ann: Se True, recria o índice ANN a partir do grafo antes
+                da engine 'ann' (também feito quando o índice está vazio)
+            full: Se True, recalcula a vizinhança de todos os Items. Por
+                padrão só os Items gravados (processado_em) depois da última
+                execução são recalculados, e suas arestas antigas removidas;
+                a engine 'names' é sempre completa
+            write_batch_size: Arestas gravadas por query (engines 'names',
+                'numpy' e 'ann')
 
         Returns:
             Número de relacionamentos criados
@@ -44,9 +138,33 @@ class RelationshipManager:
         # Criar índice se não existe
         self.create_vector_index(index_name)
 
+        if engine in ("stored", "numpy", "ann"):
+            dirty = None if full else self._start_incremental_pass()
+            if dirty is not None:
+                print(f"♻️ {len(dirty)} itens novos ou alterados desde a última execução")
+                if not dirty:
+                    self._finish_pass()
+                    return 0
+                self._delete_relationships(dirty, batch_size)
+            else:
+                self._start_full_pass()
+
+            if engine == "stored":
+                count = self._relationships_from_stored(threshold, index_name, k, batch_size, dirty)
+            elif engine == "numpy":
+                count = self._relationships_numpy(threshold, k, workers, memory_mb, dirty,
+                                                  write_batch_size)
+            else:
+                count = self._relationships_ann(threshold, k, rebuild_ann, dirty,
+                                                write_batch_size)
+            self._finish_pass()
+            return count
+        if engine != "names":
+            raise ValueError(f"Engine desconhecida: {engine}")
+
         # Configurar vector store
         vector_store = Neo4jVector.from_existing_index(
-            embedding=self.embedding_manager.embedding_model,
+            embedding=self.embedding_manager,
             index_name=index_name,
             node_label="Item",
             embedding_node_property="embedding",
@@ -57,32 +175,196 @@ class RelationshipManager:
         # Buscar todos os itens
         items = self.graph.query("MATCH (i:Item) RETURN i.id as id, i.nome as nome, i.tipo as tipo")
 
+        with self._related_writer(write_batch_size) as writer:
+            for item in items:
+                # Buscar top 10 similares
+                search_text = f"{item['nome']} {item.get('tipo', '')}"
+                similares = vector_store.similarity_search_with_score(search_text, k=11)
+
+                for doc, score in similares:
+                    if score > threshold and doc.metadata.get('id') != item['id']:
+                        writer.add(item['id'], doc.metadata.get('id'), {"score": float(score)})
+                        print(f"  🔗 {item['nome']} ↔ {doc.metadata.get('nome')} ({score:.3f})")
+
+        print(f"\n✅ {writer.written} relacionamentos semânticos criados!")
+        return writer.written
+
+    def _related_writer(self, batch_size: int) -> BulkEdgeWriter:
+        """Gravador em lote das arestas RELACIONADO_A (não direcionadas)"""
+        return BulkEdgeWriter(self.graph, "RELACIONADO_A", "Item", "Item", directed=False,
+                              timestamp_property="descoberto_em", batch_size=batch_size)
+
+    def _start_incremental_pass(self) -> Optional[List[str]]:
+        """
+        Marca o início de uma execução e lista os Items gravados desde a anterior
+
+        Returns:
+            Ids dos Items a recalcular, ou None se ainda não houve execução
+            completa (sem marca d'água)
+        """
+        rows = self.graph.query("""
+        MERGE (e:Estado {nome: $nome})
+        SET e.iniciado_em = datetime()
+        WITH e
+        OPTIONAL MATCH (i:Item)
+        WHERE e.processado_ate IS NOT NULL
+          AND i.embedding IS NOT NULL
+          AND i.processado_em > e.processado_ate
+        RETURN e.processado_ate IS NOT NULL AS tem_marca, collect(i.id) AS ids
+        """, {"nome": WATERMARK_NAME})
+        if not rows or not rows[0]["tem_marca"]:
+            return None
+        return rows[0]["ids"]
+
+    def _start_full_pass(self, name: str = WATERMARK_NAME) -> Any:
+        """Marca o início de uma execução, retornando a marca d'água anterior (ou None)"""
+        rows = self.graph.query("""
+        MERGE (e:Estado {nome: $nome})
+        SET e.iniciado_em = datetime()
+        RETURN e.processado_ate AS desde
+        """, {"nome": name})
+        return rows[0]["desde"] if rows else None
+
+    def _finish_pass(self, name: str = WATERMARK_NAME) -> None:
+        """
+        Avança a marca d'água para o início da execução
+
+        Items gravados durante a execução ficam depois da marca e entram na próxima.
+        """
+        self.graph.query("""
+        MATCH (e:Estado {nome: $nome})
+        SET e.processado_ate = e.iniciado_em
+        """, {"nome": name})
+
+    def _delete_relationships(self, ids: List[str], batch_size: int) -> None:
+        """Remove as arestas RELACIONADO_A calculadas com os vetores antigos dos Items"""
+        for batch in iter_batches(ids, batch_size):
+            self.graph.query("""
+            UNWIND $ids AS id
+            MATCH (:Item {id: id})-[r:RELACIONADO_A]-()
+            DELETE r
+            """, {"ids": batch})
+
+    def _relationships_from_stored(self, threshold: float, index_name: str,
+                                   k: int, batch_size: int,
+                                   ids: Optional[List[str]] = None) -> int:
+        """Relacionamentos pelos embeddings gravados, em lotes de Items"""
+        if ids is None:
+            ids = [row["id"] for row in self.graph.query("""
+            MATCH (i:Item) WHERE i.embedding IS NOT NULL
+            RETURN i.id AS id ORDER BY id
+            """)]
+        print(f"📦 {len(ids)} itens com embedding, lotes de {batch_size}")
+
         count = 0
-        for item in items:
-            # Buscar top 10 similares
-            search_text = f"{item['nome']} {item.get('tipo', '')}"
-            similares = vector_store.similarity_search_with_score(search_text, k=11)
-
-            for doc, score in similares:
-                if score > threshold and doc.metadata.get('id') != item['id']:
-                    # Criar relacionamento
-                    self.graph.query("""
-                    MATCH (i1:Item {id: $id1})
-                    MATCH (i2:Item {id: $id2})
-                    MERGE (i1)-[r:RELACIONADO_A]-(i2)
-                    SET r.score = $score,
-                        r.descoberto_em = datetime()
-                    """, {
-                        "id1": item['id'],
-                        "id2": doc.metadata.get('id'),
-                        "score": float(score)
-                    })
-                    print(f"  🔗 {item['nome']} ↔ {doc.metadata.get('nome')} ({score:.3f})")
-                    count += 1
+        for batch in iter_batches(ids, batch_size):
+            pairs = self.graph.query(STORED_NEIGHBORS_QUERY, {
+                "ids": batch,
+                "index_name": index_name,
+                "k": k + 1,  # o próprio Item volta como vizinho mais próximo
+                "threshold": threshold,
+            })
+            for pair in pairs:
+                print(f"  🔗 {pair['origem']} ↔ {pair['destino']} ({pair['score']:.3f})")
+            count += len(pairs)
 
         print(f"\n✅ {count} relacionamentos semânticos criados!")
         return count
 
+    def _relationships_numpy(self, threshold: float, k: int, workers: int, memory_mb: int,
+                             dirty: Optional[List[str]] = None,
+                             write_batch_size: int = 1000) -> int:
+        """kNN exato calculado localmente em blocos e gravado em lote"""
+        ids, matrix = load_embeddings(self.graph)
+        print(f"📥 {len(ids)} embeddings carregados ({matrix.nbytes / 1e6:.0f} MB)")
+
+        rows = None
+        if dirty is not None:
+            wanted = set(dirty)
+            rows = [row for row, item_id in enumerate(ids) if item_id in wanted]
+        sources, targets, scores = knn_pairs(matrix, k=k, threshold=threshold,
+                                             memory_mb=memory_mb, workers=workers, rows=rows)
+        with self._related_writer(write_batch_size) as writer:
+            for a, b, score in zip(sources.tolist(), targets.tolist(), scores.tolist()):
+                writer.add(ids[a], ids[b], {"score": float(score)})
+
+        print(f"\n✅ {writer.written} relacionamentos semânticos criados!")
+        return writer.written
+
+    def _relationships_ann(self, threshold: float, k: int, rebuild: bool,
+                           dirty: Optional[List[str]] = None,
+                           write_batch_size: int = 1000) -> int:
+        """Vizinhos buscados no índice ANN local e gravados em lote"""
+        index = get_item_index()
+        if rebuild or not len(index):
+            print("📥 Recriando índice ANN a partir do grafo...")
+            index.rebuild_from_graph(self.graph, "Item", "embedding", "id")
+        else:
+            if dirty:
+                # Items gravados sem ANN_INDEX=true ainda não estão no índice
+                for batch in iter_batches(dirty, write_batch_size):
+                    rows = self.graph.query("""
+                    UNWIND $ids AS id
+                    MATCH (i:Item {id: id}) WHERE i.embedding IS NOT NULL
+                    RETURN i.id AS id, i.embedding AS embedding
+                    """, {"ids": batch})
+                    index.add_many((r["id"], r["embedding"]) for r in rows)
+            index.maybe_train()
+        print(f"🧭 Índice ANN com {len(index)} itens")
+
+        with self._related_writer(write_batch_size) as writer:
+            for pair in ann_pairs(index, k=k, threshold=threshold, keys=dirty):
+                writer.add(pair["origem"], pair["destino"], {"score": pair["score"]})
+
+        print(f"\n✅ {writer.written} relacionamentos semânticos criados!")
+        return writer.written
+
+    def find_similar_items(self, item_id: str, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Itens mais similares a um Item, pelo índice ANN local
+
+        Usa o índice vetorial do Neo4j quando o Item ainda não está no índice local.
+
+        Returns:
+            Lista de {id, score}, do mais similar para o menos
+        """
+        neighbors = get_item_index().search_key(item_id, k=k)
+        if neighbors:
+            return [{"id": key, "score": score} for key, score in neighbors]
+
+        return self.graph.query("""
+        MATCH (i:Item {id: $id})
+        CALL db.index.vector.queryNodes('itens_similares', $k, i.embedding)
+        YIELD node, score
+        WHERE node <> i
+        RETURN node.id AS id, score
+        ORDER BY score DESC
+        """, {"id": item_id, "k": k + 1})
+
+    def detect_communities(self, min_size: int = 3, min_score: float = 0.75,
+                           full: bool = False) -> List[Dict[str, Any]]:
+        """
+        Detecta comunidades de Items e grava nós Cluster com arestas PERTENCE_A
+
+        Args:
+            min_size: Número mínimo de Items por Cluster
+            min_score: Score mínimo das arestas RELACIONADO_A consideradas
+            full: Se True, recalcula do zero em vez de partir dos Clusters atuais
+
+        Returns:
+            Lista de Clusters gravados
+        """
+        print(f"🧩 Detectando comunidades de conhecimento (mínimo {min_size} itens)...\n")
+        clusters = CommunityDetector(self.graph).detect(min_size=min_size, min_score=min_score,
+                                                        full=full)
+
+        for idx, cluster in enumerate(clusters[:20], 1):
+            print(f"\n  {idx}. {cluster['nome']} ({cluster['tamanho']} itens)")
+            if cluster['oportunidade']:
+                print(f"     💡 {cluster['oportunidade']}")
+
+        return clusters
+
     def detect_clusters(self, min_connections: int = 2) -> List[Dict[str, Any]]:
         """
         Detecta clusters de conhecimento fortemente conectado
@@ -115,56 +397,67 @@ class RelationshipManager:
 
         return clusters
 
-    def detect_evolutions(self) -> List[Dict[str, Any]]:
+    def detect_evolutions(self, min_score: float = 0.85, full: bool = False,
+                          window_size: int = 500) -> List[Dict[str, Any]]:
         """
         Detecta quando ideias/notas evoluíram para projetos
 
+        Só os Items com arestas RELACIONADO_A descobertas (ou conteúdo
+        gravado) desde a execução anterior são varridos, em janelas de
+        `window_size` ids; as arestas EVOLUIU_PARA desses Items são
+        recalculadas e gravadas em lote.
+
+        Args:
+            min_score: Score mínimo da aresta RELACIONADO_A
+            full: Se True, varre todos os Items com arestas RELACIONADO_A
+            window_size: Items por query
+
         Returns:
             Lista de evoluções detectadas
         """
         print("⏳ Rastreando evolução de conhecimento...\n")
 
-        evolutions = self.graph.query("""
-        MATCH (i1:Item)-[r:RELACIONADO_A]-(i2:Item)
-        WHERE r.score > 0.85
-          AND i1.tipo <> i2.tipo
-          AND (
-            (i1.tipo IN ['ideia', 'nota'] AND i2.tipo IN ['projeto', 'codigo'])
-            OR
-            (i1.tipo IN ['prompt'] AND i2.tipo IN ['projeto', 'codigo'])
-          )
-          AND i1.modificado < i2.modificado
-        RETURN i1.nome as origem,
-               i1.tipo as tipo_origem,
-               i1.modificado as data_origem,
-               i2.nome as destino,
-               i2.tipo as tipo_destino,
-               i2.modificado as data_destino,
-               r.score as similaridade
-        ORDER BY data_destino DESC
-        """)
+        since = self._start_full_pass(EVOLUTIONS_WATERMARK_NAME)
+        if full or since is None:
+            ids = [row["id"] for row in self.graph.query("""
+            MATCH (i:Item) WHERE (i)-[:RELACIONADO_A|EVOLUIU_PARA]-()
+            RETURN i.id AS id ORDER BY id
+            """)]
+        else:
+            ids = sorted(row["id"] for row in self.graph.query(EVOLUTION_TOUCHED_QUERY,
+                                                               {"desde": since}))
+            print(f"♻️ {len(ids)} itens com arestas ou conteúdo novos desde a última execução")
 
-        count = 0
-        for evo in evolutions:
-            count += 1
+        evolutions: Dict[tuple, Dict[str, Any]] = {}
+        with BulkEdgeWriter(self.graph, "EVOLUIU_PARA", "Item", "Item",
+                            timestamp_property="detectado_em") as writer:
+            for window in iter_batches(ids, window_size):
+                # As evoluções desses Items são recalculadas por completo
+                writer.flush()
+                self.graph.query("""
+                UNWIND $ids AS id
+                MATCH (:Item {id: id})-[e:EVOLUIU_PARA]-(:Item)
+                DELETE e
+                """, {"ids": window})
+
+                for evo in self.graph.query(EVOLUTION_WINDOW_QUERY, {
+                    "ids": window,
+                    "min_score": min_score,
+                    "tipos_origem": EVOLUTION_SOURCE_TYPES,
+                    "tipos_destino": EVOLUTION_TARGET_TYPES,
+                }):
+                    evolutions[(evo['origem_id'], evo['destino_id'])] = evo
+                    writer.add(evo['origem_id'], evo['destino_id'],
+                               {"score": float(evo['similaridade'])})
+
+        results = sorted(evolutions.values(), key=lambda e: str(e['data_destino']), reverse=True)
+        for count, evo in enumerate(results, 1):
             print(f"🌱 EVOLUÇÃO {count}:")
-            print(f"   {evo['origem']} ({evo['tipo_origem']}) [{evo['data_origem'][:10]}]")
+            print(f"   {evo['origem']} ({evo['tipo_origem']}) [{str(evo['data_origem'])[:10]}]")
             print(f"   ↓")
-            print(f"   {evo['destino']} ({evo['tipo_destino']}) [{evo['data_destino'][:10]}]")
+            print(f"   {evo['destino']} ({evo['tipo_destino']}) [{str(evo['data_destino'])[:10]}]")
             print(f"   Similaridade: {evo['similaridade']:.2f}\n")
 
-            # Criar relacionamento de evolução
-            self.graph.query("""
-            MATCH (i1:Item {nome: $origem})
-            MATCH (i2:Item {nome: $destino})
-            MERGE (i1)-[e:EVOLUIU_PARA]->(i2)
-            SET e.score = $score,
-                e.detectado_em = datetime()
-            """, {
-                "origem": evo['origem'],
-                "destino": evo['destino'],
-                "score": float(evo['similaridade'])
-            })
-
-        print(f"✅ {count} evoluções detectadas e registradas!")
-        return evolutions
+        self._finish_pass(EVOLUTIONS_WATERMARK_NAME)
+        print(f"✅ {len(results)} evoluções detectadas e registradas!")
+        return results
@@ -1,16 +1,25 @@
 """Indexação de projetos e documentação"""
 
-import json
 from pathlib import Path
 from typing import Optional, Dict, Any
 from datetime import datetime
 
 from langchain_core.prompts import ChatPromptTemplate
 
-from src.config import get_graph
+from src.config import get_graph, get_token_budget
 from src.shared.embeddings import EmbeddingManager
-from src.shared.llm import LLMConfig
-from src.shared.utils import generate_hash, read_file_content
+from src.shared.journal import RunJournal, STAGE_WRITTEN
+from src.shared.llm import LLMConfig, get_model_name, parse_json_response
+from src.shared.llm_cache import LLMCache
+from src.shared.prompting import build_salient_excerpt
+from src.shared.rate_limit import get_rate_limiter
+from src.shared.tech_extractor import extract_project_stacks
+from src.shared.utils import generate_hash, read_file_content, is_doc_file, iter_batches
+from src.shared.walker import walk_files
+
+
+# Versão do prompt de metadados (altere ao mudar o prompt para invalidar o cache)
+METADATA_PROMPT_VERSION = "metadados-v2"
 
 
 class ProjectIndexer:
@@ -20,13 +29,21 @@ class ProjectIndexer:
         self.graph = get_graph()
         self.embedding_manager = EmbeddingManager()
         self.llm = LLMConfig.classification_llm()
+        self.llm_cache = LLMCache()
+        self.rate_limiter = get_rate_limiter("llm")
+        self.journal = RunJournal()
 
-    def index_project(self, project_path: str) -> int:
+    def index_project(self, project_path: str, batch_embeddings: bool = False,
+                      resume: bool = False) -> int:
         """
         Indexa um diretório de projeto completo
 
         Args:
             project_path: Caminho do diretório do projeto
+            batch_embeddings: Se True, gera embeddings de vários arquivos por
+                chamada (tamanho de lote definido pelo provedor)
+            resume: Se True, retoma a última indexação interrompida deste
+                projeto, pulando os arquivos já gravados
 
         Returns:
             Número de arquivos indexados
@@ -41,19 +58,50 @@ class ProjectIndexer:
         # Criar nó do projeto
         self._create_project_node(project_name, str(root))
 
-        # Indexar arquivos de documentação
-        doc_extensions = ['.md', '.rst', '.README*', '.CHANGELOG*']
-        doc_files = []
-
-        for ext in doc_extensions:
-            doc_files.extend(root.rglob(ext))
+        # Stack declarada nos manifestos da raiz (pyproject, package.json, Dockerfile...)
+        stacks = extract_project_stacks(root)
+        if stacks:
+            self._create_project_relations(project_name, {"stacks": stacks})
+            print(f"🧱 Stack dos manifestos: {', '.join(stacks)}")
 
-        for file_path in doc_files:
-            if file_path.is_file():
-                self._index_file(file_path, project_name)
+        self.journal.open_run("index", str(root.resolve()), resume=resume)
+        if resume:
+            print(f"↩️ Retomando indexação: {self.journal.resumed_count} arquivos já gravados")
 
-        print(f"✅ Projeto {project_name} indexado com {len(doc_files)} arquivos")
-        return len(doc_files)
+        # Indexar arquivos de documentação (ignorando .git, node_modules, .gitignore...)
+        doc_files = (
+            f for f in walk_files(root, file_filter=is_doc_file)
+            if not self.journal.is_written(str(f))
+        )
+        count = 0
+        failures = 0
+
+        if batch_embeddings:
+            for group in iter_batches(doc_files, self.embedding_manager.batch_size):
+                count += len(group)
+                contents = [(f, read_file_content(f)) for f in group]
+                contents = [(f, c) for f, c in contents if c]
+                if not contents:
+                    continue
+                try:
+                    embeddings = self.embedding_manager.embed_texts_batched([c for _, c in contents])
+                except Exception as e:
+                    print(f"    ❌ Erro ao gerar embeddings do lote: {e}")
+                    failures += len(contents)
+                    continue
+                for (file_path, content), embedding in zip(contents, embeddings):
+                    failures += not self._safe_index_file(file_path, project_name, content, embedding)
+        else:
+            for file_path in doc_files:
+                count += 1
+                failures += not self._safe_index_file(file_path, project_name)
+
+        if failures:
+            print(f"⚠️ {failures} arquivos falharam; use --resume para reprocessar só eles")
+        else:
+            self.journal.finish()
+        print(f"✅ Projeto {project_name} indexado com {count} arquivos")
+        return count
 
     def _create_project_node(self, project_name: str, project_path: str):
         """Cria nó do projeto no grafo"""
@@ -63,15 +111,27 @@ class ProjectIndexer:
         SET p.path = $path
         """, {"nome": project_name, "path": project_path})
 
-    def _index_file(self, file_path: Path, project_name: str):
+    def _safe_index_file(self, file_path: Path, project_name: str, *args) -> bool:
+        """Indexa um arquivo sem interromper o projeto em caso de erro"""
+        try:
+            self._index_file(file_path, project_name, *args)
+            return True
+        except Exception as e:
+            print(f"    ❌ {file_path.name}: {e}")
+            return False
+
+    def _index_file(self, file_path: Path, project_name: str,
+                    content: Optional[str] = None, embedding: Optional[list] = None):
         """
         Indexa um arquivo individual com extração de metadados
 
         Args:
             file_path: Caminho do arquivo
             project_name: Nome do projeto
+            content: Conteúdo já lido (opcional)
+            embedding: Embedding pré-calculado no modo em lote (opcional)
         """
-        content = read_file_content(file_path)
+        content = content or read_file_content(file_path)
         if not content:
             return
 
@@ -79,11 +139,11 @@ class ProjectIndexer:
         content_hash = generate_hash(content)
         last_modified = datetime.fromtimestamp(file_path.stat().st_mtime)
 
-        # Gerar embedding
-        embedding = self.embedding_manager.embed_text(content[:8000])
+        # Gerar embedding (se não veio do lote)
+        embedding = embedding or self.embedding_manager.embed_text(content)
 
         # Extrair metadados com LLM
-        metadata = self._extract_metadata(file_path, content)
+        metadata = self._extract_metadata(file_path, content, content_hash)
 
         # Inserir arquivo no grafo
         self._create_file_node(
@@ -93,13 +153,21 @@ class ProjectIndexer:
 
         # Adicionar relações do projeto
         self._create_project_relations(project_name, metadata)
+        self.journal.mark([str(file_path)], STAGE_WRITTEN)
 
         tema = metadata.get("tema")
         stacks = metadata.get("stacks", [])
         print(f"    ✅ {file_path.name} → Tema: {tema} | Stacks: {stacks}")
 
-    def _extract_metadata(self, file_path: Path, content: str) -> Dict[str, Any]:
-        """Extrai metadados do arquivo usando LLM"""
+    def _extract_metadata(self, file_path: Path, content: str,
+                          content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Extrai metadados do arquivo usando LLM (com cache por hash do conteúdo)"""
+        content_hash = content_hash or generate_hash(content)
+        model_name = get_model_name(self.llm)
+        cached = self.llm_cache.get(content_hash, METADATA_PROMPT_VERSION, model_name)
+        if cached is not None:
+            return cached
+
         prompt = ChatPromptTemplate.from_messages([
             ("system", """Analise este arquivo de documentação e extraia em JSON:
             {{
@@ -118,14 +186,17 @@ class ProjectIndexer:
 
         chain = prompt | self.llm
 
+        result = self.rate_limiter.call(chain.invoke, {
+            "nome": file_path.name,
+            "path": str(file_path),
+            "conteudo": build_salient_excerpt(content, get_token_budget("metadata"), model_name)
+        })
+
         try:
-            result = chain.invoke({
-                "nome": file_path.name,
-                "path": str(file_path),
-                "conteudo": content[:4000]
-            })
-            return json.loads(result.content)
-        except:
+            metadata = parse_json_response(result.content)
+            self.llm_cache.put(content_hash, METADATA_PROMPT_VERSION, model_name, metadata)
+            return metadata
+        except (ValueError, TypeError):
             return {
                 "projeto_nome": file_path.parent.name,
                 "tema": None,
@@ -174,12 +245,14 @@ class ProjectIndexer:
             """, {"projeto_nome": project_name, "tema": metadata["tema"]})
 
         # Stacks
-        for stack in metadata.get("stacks", []):
+        stacks = [str(s) for s in (metadata.get("stacks") or []) if s]
+        if stacks:
             self.graph.query("""
             MATCH (p:Projeto {nome: $projeto_nome})
-            MERGE (s:Stack {nome: $stack})
+            UNWIND $stacks AS stack
+            MERGE (s:Stack {nome: stack})
             MERGE (p)-[:USA_STACK]->(s)
-            """, {"projeto_nome": project_name, "stack": stack})
+            """, {"projeto_nome": project_name, "stacks": stacks})
 
         # Versão
         if metadata.get("versao"):
@@ -1,11 +1,15 @@
 """Similaridade entre projetos"""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal
 
 from langchain_neo4j import Neo4jVector
 
-from src.config import get_graph
+from src.config import get_graph, is_ann_index_enabled
 from src.shared.embeddings import EmbeddingManager
+from src.shared.graph_writer import BulkEdgeWriter
+from src.shared.schema import (
+    STACKS_FULLTEXT_INDEX, THEMES_FULLTEXT_INDEX, ensure_schema_once, fulltext_query
+)
 
 
 class SimilarityEngine:
@@ -33,6 +37,7 @@ class SimilarityEngine:
         """)
 
         count = 0
+        computed = []
         for project in projects:
             if project['descricao_agregada']:
                 emb = self.embedding_manager.embed_text(project['descricao_agregada'])
@@ -40,8 +45,14 @@ class SimilarityEngine:
                 MATCH (p:Projeto {nome: $nome})
                 SET p.embedding_descricao = $embedding
                 """, {"nome": project['nome'], "embedding": emb})
+                computed.append((project['nome'], emb))
                 count += 1
 
+        # Espelhar no índice ANN local, se habilitado
+        if computed and is_ann_index_enabled():
+            from src.shared.ann import get_project_index
+            get_project_index().add_many(computed)
+
         print(f"✅ Embeddings calculados para {count} projetos!")
         return count
 
@@ -58,25 +69,34 @@ class SimilarityEngine:
         """)
 
     def connect_similar_projects(self, threshold: float = 0.7,
-                                index_name: str = "projetos_similares") -> int:
+                                index_name: str = "projetos_similares",
+                                engine: Literal["index", "ann"] = "index",
+                                rebuild_ann: bool = False) -> int:
         """
         Cria relacionamentos SIMILAR_A entre projetos similares
 
         Args:
             threshold: Limiar de similaridade
             index_name: Nome do índice vetorial
+            engine: 'index' usa o índice vetorial do Neo4j; 'ann' usa o índice
+                ANN local com os embeddings de descrição já calculados
+            rebuild_ann: Se True, recria o índice ANN a partir do grafo antes
+                da engine 'ann' (também feito quando o índice está vazio)
 
         Returns:
             Número de conexões criadas
         """
         print(f"🔗 Conectando projetos similares (threshold: {threshold})...")
 
+        if engine == "ann":
+            return self._connect_with_ann(threshold, rebuild=rebuild_ann)
+
         # Criar índice
         self.create_vector_index(index_name)
 
         # Configurar vector store
         vector_store = Neo4jVector.from_existing_index(
-            embedding=self.embedding_manager.embedding_model,
+            embedding=self.embedding_manager,
             index_name=index_name,
             node_label="Projeto",
             embedding_node_property="embedding_descricao",
@@ -87,31 +107,44 @@ class SimilarityEngine:
         # Buscar todos os projetos
         projects = self.graph.query("MATCH (p:Projeto) RETURN p.nome as nome")
 
-        count = 0
-        for project in projects:
-            # Buscar top 5 similares
-            similares = vector_store.similarity_search_with_score(
-                project['nome'],
-                k=6
-            )
-
-            for doc, score in similares:
-                if score > threshold and doc.metadata.get('nome') != project['nome']:
-                    self.graph.query("""
-                    MATCH (p1:Projeto {nome: $projeto1})
-                    MATCH (p2:Projeto {nome: $projeto2})
-                    MERGE (p1)-[r:SIMILAR_A]-(p2)
-                    SET r.score = $score
-                    """, {
-                        "projeto1": project['nome'],
-                        "projeto2": doc.metadata['nome'],
-                        "score": float(score)
-                    })
-                    print(f"  🔗 {project['nome']} ↔ {doc.metadata['nome']} ({score:.2f})")
-                    count += 1
-
-        print(f"\n✅ {count} conexões similares criadas!")
-        return count
+        with self._similar_writer() as writer:
+            for project in projects:
+                # Buscar top 5 similares
+                similares = vector_store.similarity_search_with_score(
+                    project['nome'],
+                    k=6
+                )
+
+                for doc, score in similares:
+                    if score > threshold and doc.metadata.get('nome') != project['nome']:
+                        writer.add(project['nome'], doc.metadata['nome'], {"score": float(score)})
+                        print(f"  🔗 {project['nome']} ↔ {doc.metadata['nome']} ({score:.2f})")
+
+        print(f"\n✅ {writer.written} conexões similares criadas!")
+        return writer.written
+
+    def _similar_writer(self) -> BulkEdgeWriter:
+        """Gravador em lote das arestas SIMILAR_A (não direcionadas, por Projeto.nome)"""
+        return BulkEdgeWriter(self.graph, "SIMILAR_A", "Projeto", "Projeto",
+                              source_key="nome", target_key="nome", directed=False)
+
+    def _connect_with_ann(self, threshold: float, k: int = 5, rebuild: bool = False) -> int:
+        """Conexões SIMILAR_A a partir do índice ANN local, gravadas em lote"""
+        from src.shared.ann import ann_pairs, get_project_index
+
+        index = get_project_index()
+        if rebuild or not len(index):
+            print("📥 Recriando índice ANN de projetos a partir do grafo...")
+            index.rebuild_from_graph(self.graph, "Projeto", "embedding_descricao", "nome")
+        else:
+            index.maybe_train()
+        with self._similar_writer() as writer:
+            for pair in ann_pairs(index, k=k, threshold=threshold):
+                writer.add(pair["origem"], pair["destino"], {"score": pair["score"]})
+                print(f"  🔗 {pair['origem']} ↔ {pair['destino']} ({pair['score']:.2f})")
+
+        print(f"\n✅ {writer.written} conexões similares criadas!")
+        return writer.written
 
     def find_similar_to(self, project_name: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -135,41 +168,78 @@ class SimilarityEngine:
 
         return results
 
-    def group_by_theme(self, theme: str) -> List[Dict[str, Any]]:
+    def group_by_theme(self, theme: str, limit: int = 50, skip: int = 0,
+                       fuzzy: bool = False) -> List[Dict[str, Any]]:
         """
         Agrupa projetos por tema
 
         Args:
-            theme: Tema para buscar
+            theme: Tema para buscar (índice full-text, sem diferenciar acentos;
+                cada termo também como prefixo)
+            limit: Projetos por página
+            skip: Projetos a pular (página * limit)
+            fuzzy: Se True, aceita erros de digitação
 
         Returns:
-            Lista de projetos do tema
+            Lista de projetos do tema, do tema mais relevante para o menos
         """
+        search = fulltext_query(theme, fuzzy=fuzzy)
+        if not search:
+            return []
+        ensure_schema_once(self.graph)
+
         results = self.graph.query("""
-        MATCH (p:Projeto)-[:TEM_TEMA]->(t:Tema)
-        WHERE toLower(t.nome) CONTAINS toLower($theme)
+        CALL db.index.fulltext.queryNodes($index, $busca) YIELD node AS t, score
+        MATCH (p:Projeto)-[:TEM_TEMA]->(t)
+        WITH p, max(score) as relevancia
         RETURN p.nome, p.path
-        """, {"theme": theme})
+        ORDER BY relevancia DESC, p.nome
+        SKIP $skip
+        LIMIT $limit
+        """, {"index": THEMES_FULLTEXT_INDEX, "busca": search, "skip": skip, "limit": limit})
 
         return results
 
-    def group_by_stack(self, stack: str) -> List[Dict[str, Any]]:
+    def group_by_stack(self, stack: str, limit: int = 50, skip: int = 0,
+                       fuzzy: bool = False) -> List[Dict[str, Any]]:
         """
         Agrupa projetos por tecnologia
 
         Args:
-            stack: Nome da tecnologia
+            stack: Nome exato da tecnologia, sem diferenciar maiúsculas ("java"
+                não encontra "JavaScript" nem "Java Script"); o índice full-text
+                só localiza os candidatos
+            limit: Projetos por página
+            skip: Projetos a pular (página * limit)
+            fuzzy: Se True, aceita erros de digitação e casa por termos, sem
+                exigir o nome exato
 
         Returns:
             Lista de projetos com a stack
         """
+        search = fulltext_query(stack, fuzzy=fuzzy, prefix=False)
+        if not search:
+            return []
+        ensure_schema_once(self.graph)
+
         results = self.graph.query("""
-        MATCH (p:Projeto)-[:USA_STACK]->(s:Stack)
-        WHERE toLower(s.nome) = toLower($stack)
+        CALL db.index.fulltext.queryNodes($index, $busca) YIELD node AS s, score
+        WHERE $fuzzy OR toLower(s.nome) = toLower($stack)
+        MATCH (p:Projeto)-[:USA_STACK]->(s)
+        WITH p, max(score) as relevancia
         RETURN p.nome,
                [(p)-[:TEM_TEMA]->(t) | t.nome][0] as tema
-        ORDER BY tema
-        """, {"stack": stack})
+        ORDER BY relevancia DESC, tema, p.nome
+        SKIP $skip
+        LIMIT $limit
+        """, {
+            "index": STACKS_FULLTEXT_INDEX,
+            "busca": search,
+            "stack": stack.strip(),
+            "fuzzy": fuzzy,
+            "skip": skip,
+            "limit": limit,
+        })
 
         return results
 
@@ -1,8 +1,16 @@
 """Utilitários compartilhados"""
 
 __all__ = [
+    "BulkEdgeWriter",
+    "EmbeddingCache",
     "EmbeddingManager",
+    "FileManifest",
+    "LLMCache",
     "LLMConfig",
+    "RunStats",
+    "SketchIndex",
+    "ensure_schema",
+    "ensure_schema_once",
     "generate_hash",
     "read_file_content",
 ]
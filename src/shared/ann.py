@@ -0,0 +1,316 @@
+"""Índice ANN local (IVF sobre vetores float32 mapeados em memória)"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.config import StateConfig
+from src.shared.knn import cosine_to_score, load_embeddings, require_numpy
+from src.shared.state import SQLiteStore
+
+# Listas verificadas por consulta (mais listas = mais recall, mais custo)
+DEFAULT_NPROBE = 8
+
+# Abaixo disso a busca é exata (varre todos os vetores)
+MIN_TRAIN_SIZE = 2048
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 10000
+
+
+class AnnIndex(SQLiteStore):
+    """
+    Índice de vizinhos aproximados em disco, espelhando embeddings do grafo
+
+    Os vetores (normalizados) ficam num arquivo float32 contíguo lido por
+    np.memmap; as chaves, a lista IVF de cada vetor e os centróides ficam no
+    SQLite. Uma consulta compara o vetor com os centróides, varre só as
+    `nprobe` listas mais próximas e os vetores inseridos depois do último
+    treino. Inserções são incrementais: novos vetores são anexados ao
+    arquivo e atribuídos ao centróide mais próximo.
+
+    Os scores seguem a escala do índice vetorial do Neo4j, (1 + cos) / 2.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS vetores (
+        chave TEXT PRIMARY KEY,
+        linha INTEGER NOT NULL,
+        lista INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        chave TEXT PRIMARY KEY,
+        valor BLOB
+    );
+    """
+
+    def __init__(self, name: str, path: Optional[Union[str, Path]] = None):
+        path = Path(path) if path else StateConfig.get_state_dir() / f"ann_{name}.db"
+        super().__init__(path)
+        self.name = name
+        self.vectors_path = self.path.with_suffix(".f32")
+        self._np = require_numpy()
+        self._load()
+
+    def _load(self) -> None:
+        """Carrega chaves, listas e centróides para a memória"""
+        np = self._np
+        rows = self._conn.execute("SELECT chave, linha, lista FROM vetores ORDER BY linha").fetchall()
+        self._keys: List[str] = [r[0] for r in rows]
+        self._rows: Dict[str, int] = {r[0]: r[1] for r in rows}
+        self._lists = np.array([r[2] for r in rows], dtype=np.int32)
+        self._rebuild_inverted()
+
+        meta = dict(self._conn.execute("SELECT chave, valor FROM meta").fetchall())
+        self.dimensions: Optional[int] = int(meta["dimensoes"]) if "dimensoes" in meta else None
+        self._centroids = None
+        if meta.get("centroides") is not None and self.dimensions:
+            self._centroids = np.frombuffer(meta["centroides"], dtype=np.float32).reshape(
+                -1, self.dimensions)
+        self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _rebuild_inverted(self) -> None:
+        """Linhas de cada lista IVF (-1: ainda não atribuídas a um centróide)"""
+        self._inverted: Dict[int, List[int]] = {}
+        for row, lista in enumerate(self._lists.tolist()):
+            self._inverted.setdefault(lista, []).append(row)
+
+    def _vectors(self):
+        """Memmap dos vetores, reaberto quando o arquivo cresce"""
+        n = len(self._keys)
+        if self._matrix is None or self._matrix.shape[0] != n:
+            self._matrix = self._np.memmap(self.vectors_path, dtype=self._np.float32, mode="r",
+                                           shape=(n, self.dimensions)) if n else None
+        return self._matrix
+
+    def _normalize(self, vectors):
+        np = self._np
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _assign(self, matrix):
+        """Lista IVF de cada vetor (-1 se o índice ainda não foi treinado)"""
+        np = self._np
+        if self._centroids is None:
+            return np.full(matrix.shape[0], -1, dtype=np.int32)
+        return np.argmax(matrix @ self._centroids.T, axis=1).astype(np.int32)
+
+    def add_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        """
+        Insere ou atualiza vetores
+
+        Args:
+            items: Pares (chave, embedding)
+
+        Returns:
+            Número de vetores gravados
+        """
+        items = [(key, vector) for key, vector in items if vector is not None and len(vector)]
+        if not items:
+            return 0
+        np = self._np
+
+        with self._lock, self._conn:
+            if self.dimensions is None:
+                self.dimensions = len(items[0][1])
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('dimensoes', ?)",
+                                   (str(self.dimensions),))
+            # Chave repetida no mesmo lote: vale o último vetor
+            items = list({k: v for k, v in items if len(v) == self.dimensions}.items())
+            if not items:
+                return 0
+
+            matrix = self._normalize([v for _, v in items])
+            lists = self._assign(matrix)
+            row_bytes = self.dimensions * 4
+
+            new_lists = []
+            records = []
+            mode = "r+b" if self.vectors_path.exists() else "w+b"
+            with open(self.vectors_path, mode) as f:
+                for (key, _), vector, lista in zip(items, matrix, lists):
+                    row = self._rows.get(key)
+                    if row is None:
+                        row = len(self._keys)
+                        self._keys.append(key)
+                        self._rows[key] = row
+                        new_lists.append(lista)
+                        self._inverted.setdefault(int(lista), []).append(row)
+                    elif self._lists[row] != lista:
+                        self._inverted[int(self._lists[row])].remove(row)
+                        self._inverted.setdefault(int(lista), []).append(row)
+                        self._lists[row] = lista
+                    f.seek(row * row_bytes)
+                    f.write(vector.tobytes())
+                    records.append((key, row, int(lista)))
+            self._conn.executemany("INSERT OR REPLACE INTO vetores VALUES (?, ?, ?)", records)
+            if new_lists:
+                self._lists = np.concatenate([self._lists, np.array(new_lists, dtype=np.int32)])
+            self._matrix = None
+        return len(items)
+
+    def train(self, nlist: Optional[int] = None) -> int:
+        """
+        Treina os centróides (k-means esférico) e reatribui todos os vetores
+
+        Args:
+            nlist: Número de listas (padrão: ~sqrt(N))
+
+        Returns:
+            Número de listas criadas (0 se o índice é pequeno demais e fica exato)
+        """
+        np = self._np
+        with self._lock, self._conn:
+            n = len(self._keys)
+            if n < MIN_TRAIN_SIZE:
+                self._centroids = None
+                self._conn.execute("DELETE FROM meta WHERE chave = 'centroides'")
+                self._lists = np.full(n, -1, dtype=np.int32)
+                self._rebuild_inverted()
+                self._conn.execute("UPDATE vetores SET lista = -1")
+                return 0
+
+            matrix = self._vectors()
+            nlist = nlist or max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(0)
+            sample = matrix[np.sort(rng.choice(n, size=min(n, KMEANS_SAMPLE), replace=False))]
+            centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+
+            for _ in range(KMEANS_ITERATIONS):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = sample[assignment == c]
+                    if len(members):
+                        centroids[c] = members.sum(axis=0)
+                centroids = self._normalize(centroids)
+
+            self._centroids = centroids.astype(np.float32)
+            lists = np.empty(n, dtype=np.int32)
+            for start in range(0, n, 8192):
+                lists[start:start + 8192] = self._assign(matrix[start:start + 8192])
+            self._lists = lists
+            self._rebuild_inverted()
+
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('centroides', ?)",
+                               (self._centroids.tobytes(),))
+            self._conn.executemany("UPDATE vetores SET lista = ? WHERE linha = ?",
+                                   [(int(lista), row) for row, lista in enumerate(lists)])
+        return nlist
+
+    def maybe_train(self) -> int:
+        """Treina de novo quando muitos vetores foram inseridos desde o último treino"""
+        untrained = int((self._lists == -1).sum())
+        if len(self) >= MIN_TRAIN_SIZE and untrained > max(1000, len(self) // 5):
+            return self.train()
+        return 0
+
+    def search(self, vector: Sequence[float], k: int = 10, nprobe: int = DEFAULT_NPROBE,
+               exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Busca os vetores mais similares (cosseno)
+
+        Args:
+            vector: Vetor de consulta
+            k: Número de resultados
+            nprobe: Listas IVF varridas
+            exclude: Chaves a desconsiderar
+
+        Returns:
+            Lista de (chave, score), do mais similar para o menos, com
+            score = (1 + cos) / 2
+        """
+        np = self._np
+        with self._lock:
+            matrix = self._vectors()
+            if matrix is None:
+                return []
+            query = self._normalize(vector)[0]
+
+            if self._centroids is None:
+                candidates = np.arange(matrix.shape[0])
+            else:
+                # Só as listas sondadas e os vetores ainda sem lista
+                nearest = np.argsort(-(self._centroids @ query))[:nprobe]
+                rows = [self._inverted.get(int(c), []) for c in nearest]
+                rows.append(self._inverted.get(-1, []))
+                candidates = np.fromiter((r for group in rows for r in group), dtype=np.int64)
+                if not len(candidates):
+                    return []
+
+            scores = cosine_to_score(matrix[candidates] @ query)
+            excluded = set(exclude)
+            order = np.argsort(-scores)
+            results = []
+            for idx in order:
+                key = self._keys[candidates[idx]]
+                if key in excluded:
+                    continue
+                results.append((key, float(scores[idx])))
+                if len(results) >= k:
+                    break
+            return results
+
+    def search_key(self, key: str, k: int = 10, nprobe: int = DEFAULT_NPROBE) -> List[Tuple[str, float]]:
+        """Vizinhos de um vetor já indexado (sem ele mesmo)"""
+        with self._lock:
+            row = self._rows.get(key)
+            vector = None if row is None else self._np.array(self._vectors()[row])
+        if vector is None:
+            return []
+        return self.search(vector, k=k, nprobe=nprobe, exclude=[key])
+
+    def keys(self) -> List[str]:
+        """Chaves indexadas"""
+        with self._lock:
+            return list(self._keys)
+
+    def rebuild_from_graph(self, graph, label: str, property_name: str, key: str) -> int:
+        """
+        Recria o índice a partir dos embeddings gravados no grafo
+
+        Returns:
+            Número de vetores indexados
+        """
+        keys, matrix = load_embeddings(graph, label=label, property_name=property_name, key=key)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM vetores")
+            self._conn.execute("DELETE FROM meta")
+            if self.vectors_path.exists():
+                os.remove(self.vectors_path)
+        self._load()
+        self.add_many(zip([str(k) for k in keys], matrix))
+        self.train()
+        return len(self)
+
+
+def get_item_index() -> AnnIndex:
+    """Índice espelhando Item.embedding (chave: Item.id)"""
+    return AnnIndex("itens")
+
+
+def get_project_index() -> AnnIndex:
+    """Índice espelhando Projeto.embedding_descricao (chave: Projeto.nome)"""
+    return AnnIndex("projetos")
+
+
+def ann_pairs(index: AnnIndex, k: int, threshold: float, nprobe: int = DEFAULT_NPROBE,
+              keys: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Pares não direcionados (origem < destino) de vizinhos com score acima do limiar
+
+    Args:
+        keys: Chaves cujos vizinhos devem ser buscados (padrão: todas)
+    """
+    pairs: Dict[Tuple[str, str], float] = {}
+    for key in (index.keys() if keys is None else keys):
+        for other, score in index.search_key(key, k=k, nprobe=nprobe):
+            if score > threshold:
+                pairs[tuple(sorted((key, other)))] = score
+    return [{"origem": a, "destino": b, "score": score} for (a, b), score in pairs.items()]
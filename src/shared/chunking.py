@@ -0,0 +1,80 @@
+"""Divisão de documentos em chunks sobrepostos, lidos em streaming"""
+
+import hashlib
+from pathlib import Path
+from typing import Iterator, Tuple
+
+
+def iter_file_chunks(file_path: Path, chunk_size: int = 2000, overlap: int = 200,
+                     encoding: str = 'utf-8') -> Iterator[Tuple[int, str]]:
+    """
+    Lê um arquivo em blocos e produz chunks sobrepostos
+
+    O arquivo nunca é carregado inteiro: apenas o chunk atual e o bloco
+    seguinte ficam em memória. Sempre que possível o corte é feito numa
+    quebra de linha ou espaço próximo do fim da janela.
+
+    Args:
+        file_path: Caminho do arquivo
+        chunk_size: Tamanho máximo de cada chunk em caracteres
+        overlap: Caracteres repetidos entre chunks consecutivos
+        encoding: Codificação (padrão: utf-8)
+
+    Yields:
+        Tuplas (posição inicial em caracteres, texto do chunk)
+    """
+    overlap = min(overlap, chunk_size // 2)
+    buffer = ""
+    offset = 0
+    carried = 0  # caracteres do início do buffer já produzidos no chunk anterior
+
+    with open(file_path, encoding=encoding, errors='ignore') as f:
+        eof = False
+        while not eof or buffer:
+            if not eof and len(buffer) < chunk_size:
+                block = f.read(chunk_size)
+                eof = not block
+                buffer += block
+                continue
+
+            if len(buffer) <= chunk_size and eof:
+                if len(buffer) > carried and buffer.strip():
+                    yield offset, buffer
+                return
+
+            cut = _find_cut(buffer, chunk_size, overlap)
+            chunk = buffer[:cut]
+            if chunk.strip():
+                yield offset, chunk
+
+            step = max(cut - overlap, 1)
+            buffer = buffer[step:]
+            offset += step
+            carried = cut - step
+
+
+def _find_cut(text: str, chunk_size: int, overlap: int) -> int:
+    """Escolhe onde cortar a janela, preferindo quebras de linha e espaços"""
+    window = text[:chunk_size]
+    min_cut = max(chunk_size - chunk_size // 5, overlap + 1)
+    for separator in ("\n\n", "\n", " "):
+        pos = window.rfind(separator, min_cut)
+        if pos != -1:
+            return pos + len(separator)
+    return chunk_size
+
+
+def hash_file(file_path: Path, encoding: str = 'utf-8', block_size: int = 1 << 20) -> str:
+    """
+    Calcula o hash SHA-256 do conteúdo textual de um arquivo em streaming
+
+    Produz o mesmo valor de generate_hash(read_file_content(file_path)).
+    """
+    digest = hashlib.sha256()
+    with open(file_path, encoding=encoding, errors='ignore') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block.encode('utf-8'))
+    return digest.hexdigest()
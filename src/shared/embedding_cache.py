@@ -0,0 +1,79 @@
+"""Cache persistente de embeddings"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.shared.state import SQLiteStore
+
+
+class EmbeddingCache(SQLiteStore):
+    """
+    Cache em disco de vetores chaveado por (modelo, hash do texto)
+
+    Os vetores são gravados como blobs float32 (4 bytes por dimensão).
+    """
+
+    FILENAME = "embeddings_cache.db"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS vetores (
+        modelo TEXT NOT NULL,
+        text_hash TEXT NOT NULL,
+        vetor BLOB NOT NULL,
+        PRIMARY KEY (modelo, text_hash)
+    ) WITHOUT ROWID;
+    """
+
+    # Limite de variáveis por SELECT ... IN (...) no SQLite
+    _MAX_PARAMS = 500
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model: str, text_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Retorna os vetores encontrados, indexados pelo hash do texto"""
+        hashes = list(dict.fromkeys(text_hashes))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(hashes), self._MAX_PARAMS):
+                chunk = hashes[start:start + self._MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"""
+                SELECT text_hash, vetor FROM vetores
+                WHERE modelo = ? AND text_hash IN ({placeholders})
+                """, (model, *chunk)).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def get(self, model: str, text_hash: str) -> Optional[List[float]]:
+        """Retorna um vetor em cache, ou None"""
+        return self.get_many(model, [text_hash]).get(text_hash)
+
+    def put_many(self, model: str, entries: Iterable[Tuple[str, List[float]]]) -> None:
+        """Armazena pares (hash do texto, vetor)"""
+        rows = [(model, text_hash, array("f", vector).tobytes()) for text_hash, vector in entries]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vetores (modelo, text_hash, vetor) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def hit_rate(self) -> float:
+        """Fração de consultas atendidas pelo cache nesta sessão"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Retorna estatísticas de uso do cache"""
+        with self._lock:
+            entries = self._conn.execute("SELECT count(*) FROM vetores").fetchone()[0]
+        return {
+            "entradas": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate(), 4),
+        }
@@ -1,23 +1,134 @@
 """Gerenciador de embeddings compartilhado"""
 
-from typing import List, Optional
+import os
+from typing import Dict, List, Optional
 from langchain_openai import OpenAIEmbeddings
 
-from src.config import get_embeddings
+from src.config import get_embeddings, get_embeddings_batch_limits, get_token_budget
+from src.shared.embedding_cache import EmbeddingCache
+from src.shared.llm import get_model_name
+from src.shared.prompting import build_salient_excerpt
+from src.shared.rate_limit import get_rate_limiter
+from src.shared.utils import count_tokens, generate_hash
 
 
 class EmbeddingManager:
     """Gerencia criação e operações com embeddings"""
 
-    def __init__(self, embedding_model: Optional[OpenAIEmbeddings] = None):
-        self.embedding_model = embedding_model or get_embeddings()
+    def __init__(self, embedding_model: Optional[OpenAIEmbeddings] = None,
+                 provider: Optional[str] = None,
+                 cache: Optional[EmbeddingCache] = None):
+        self.provider = provider or os.getenv("EMBEDDINGS_PROVIDER", "localai")
+        self.embedding_model = embedding_model or get_embeddings(provider=self.provider)
+        self.batch_size, self.batch_max_tokens = get_embeddings_batch_limits(self.provider)
+        self.model_name = get_model_name(self.embedding_model)
+        self.max_tokens = get_token_budget("embeddings")
+        self.rate_limiter = get_rate_limiter("embeddings")
 
-    def embed_text(self, text: str, max_length: int = 8000) -> List[float]:
+        if cache is None and os.getenv("EMBEDDINGS_CACHE", "true").lower() == "true":
+            cache = EmbeddingCache()
+        self.cache = cache
+
+    def _fit(self, text: str, max_length: Optional[int] = None) -> str:
+        """Reduz o texto ao orçamento de tokens, mantendo as seções mais informativas"""
+        if max_length is not None and len(text) > max_length:
+            text = text[:max_length]
+        return build_salient_excerpt(text, self.max_tokens, self.model_name)
+
+    def embed_text(self, text: str, max_length: Optional[int] = None) -> List[float]:
         """Gera embedding para um texto"""
-        text_truncated = text[:max_length] if len(text) > max_length else text
-        return self.embedding_model.embed_query(text_truncated)
+        text_truncated = self._fit(text, max_length)
+        if self.cache is None:
+            return self.rate_limiter.call(self.embedding_model.embed_query, text_truncated)
+
+        text_hash = generate_hash(text_truncated)
+        cached = self.cache.get(self.model_name, text_hash)
+        if cached is not None:
+            return cached
 
-    def embed_texts(self, texts: List[str], max_length: int = 8000) -> List[List[float]]:
+        embedding = self.rate_limiter.call(self.embedding_model.embed_query, text_truncated)
+        self.cache.put_many(self.model_name, [(text_hash, embedding)])
+        return embedding
+
+    def embed_texts(self, texts: List[str], max_length: Optional[int] = None) -> List[List[float]]:
         """Gera embeddings para múltiplos textos"""
-        texts_truncated = [t[:max_length] if len(t) > max_length else t for t in texts]
-        return self.embedding_model.embed_documents(texts_truncated)
+        texts_truncated = [self._fit(t, max_length) for t in texts]
+        return self._embed_with_cache(texts_truncated, self._embed_documents)
+
+    def embed_texts_batched(self, texts: List[str], max_length: Optional[int] = None,
+                            batch_size: Optional[int] = None,
+                            max_tokens: Optional[int] = None) -> List[List[float]]:
+        """
+        Gera embeddings em lotes limitados por quantidade e por tokens
+
+        Cada lote vira uma única chamada a embed_documents; os vetores são
+        devolvidos na mesma ordem dos textos de entrada.
+
+        Args:
+            texts: Textos a processar
+            max_length: Tamanho máximo de cada texto em caracteres (além do
+                orçamento de tokens EMBEDDINGS_MAX_TOKENS)
+            batch_size: Máximo de textos por chamada (padrão do provedor)
+            max_tokens: Máximo de tokens por chamada (padrão do provedor)
+
+        Returns:
+            Lista de embeddings alinhada com `texts`
+        """
+        batch_size = batch_size or self.batch_size
+        max_tokens = max_tokens or self.batch_max_tokens
+        texts_truncated = [self._fit(t, max_length) for t in texts]
+
+        def embed_batched(pending: List[str]) -> List[List[float]]:
+            embeddings: List[List[float]] = []
+            batch: List[str] = []
+            batch_tokens = 0
+            for text in pending:
+                tokens = count_tokens(text, self.model_name)
+                if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_tokens):
+                    embeddings.extend(self._embed_documents(batch))
+                    batch, batch_tokens = [], 0
+                batch.append(text)
+                batch_tokens += tokens
+
+            if batch:
+                embeddings.extend(self._embed_documents(batch))
+            return embeddings
+
+        return self._embed_with_cache(texts_truncated, embed_batched)
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Chamada ao provedor passando pelo limitador de taxa compartilhado"""
+        return self.rate_limiter.call(self.embedding_model.embed_documents, texts)
+
+    def _embed_with_cache(self, texts: List[str], embed_fn) -> List[List[float]]:
+        """Consulta o cache e envia ao provedor apenas os textos ausentes"""
+        if self.cache is None:
+            return embed_fn(texts) if texts else []
+
+        hashes = [generate_hash(t) for t in texts]
+        found = self.cache.get_many(self.model_name, hashes)
+
+        # Textos repetidos na mesma chamada são enviados uma única vez
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in found:
+                missing.setdefault(text_hash, text)
+
+        if missing:
+            new_embeddings = embed_fn(list(missing.values()))
+            entries = list(zip(missing.keys(), new_embeddings))
+            self.cache.put_many(self.model_name, entries)
+            found.update(entries)
+
+        return [found[h] for h in hashes]
+
+    # Interface de Embeddings do LangChain (ex: Neo4jVector), passando pelo cache
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_text(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_texts(texts)
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Estatísticas de acerto do cache de embeddings"""
+        return self.cache.stats() if self.cache is not None else {}
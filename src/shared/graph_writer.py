@@ -0,0 +1,127 @@
+"""Gravação de arestas em lote (UNWIND + MERGE) com nova tentativa em erros transitórios"""
+
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+# Propriedades e labels entram no texto da query, então só aceitamos identificadores
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Verifica se o erro do Neo4j pode ser resolvido repetindo a transação"""
+    code = str(getattr(error, "code", "") or "")
+    if code.startswith("Neo.TransientError"):
+        return True
+
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & {"TransientError", "ServiceUnavailable", "SessionExpired"}:
+        return True
+
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        "deadlock", "neo.transienterror", "lock client stopped", "connection reset",
+    ))
+
+
+def _identifier(value: str) -> str:
+    if not _IDENTIFIER.match(value):
+        raise ValueError(f"Identificador inválido para a query: {value!r}")
+    return value
+
+
+class BulkEdgeWriter:
+    """
+    Acumula arestas e grava em lotes com uma única query UNWIND por lote
+
+    Cada aresta é (origem, destino, propriedades); os nós são localizados
+    pela chave indicada (ex: Item.id) e a aresta é criada com MERGE, então
+    gravar a mesma aresta de novo só atualiza as propriedades. Pode ser
+    usado como gerenciador de contexto, que grava o resto do buffer na saída.
+
+    Exemplo:
+        with BulkEdgeWriter(graph, "RELACIONADO_A", "Item", "Item") as writer:
+            writer.add(id1, id2, {"score": 0.9})
+    """
+
+    def __init__(self, graph, relationship: str, source_label: str, target_label: str,
+                 source_key: str = "id", target_key: str = "id", directed: bool = True,
+                 timestamp_property: Optional[str] = None, batch_size: int = 1000,
+                 max_retries: int = 5, base_delay: float = 0.5):
+        """
+        Args:
+            graph: Conexão Neo4jGraph
+            relationship: Tipo da aresta
+            source_label, target_label: Labels dos nós de origem e destino
+            source_key, target_key: Propriedades usadas para localizar os nós
+            directed: Se False, o MERGE não considera a direção (a)-[r]-(b)
+            timestamp_property: Propriedade da aresta preenchida com datetime()
+            batch_size: Arestas por query
+            max_retries: Novas tentativas de um lote após erro transitório
+            base_delay: Espera inicial (segundos) do backoff exponencial
+        """
+        self.graph = graph
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.written = 0
+        self.retries = 0
+        self._buffer: List[Dict[str, Any]] = []
+
+        arrow = "->" if directed else "-"
+        timestamp = (f",\n            r.{_identifier(timestamp_property)} = datetime()"
+                     if timestamp_property else "")
+        self.query = f"""
+        UNWIND $arestas AS aresta
+        MATCH (a:{_identifier(source_label)} {{{_identifier(source_key)}: aresta.origem}})
+        MATCH (b:{_identifier(target_label)} {{{_identifier(target_key)}: aresta.destino}})
+        MERGE (a)-[r:{_identifier(relationship)}]{arrow}(b)
+        SET r += aresta.propriedades{timestamp}
+        """
+
+    def add(self, source: Any, target: Any, properties: Optional[Dict[str, Any]] = None) -> None:
+        """Adiciona uma aresta ao buffer, gravando o lote quando ele enche"""
+        self._buffer.append({"origem": source, "destino": target,
+                             "propriedades": properties or {}})
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Grava as arestas do buffer
+
+        Returns:
+            Número de arestas gravadas neste flush
+
+        Raises:
+            A última exceção, se o erro persistir após max_retries tentativas,
+            ou qualquer erro que não seja transitório
+        """
+        if not self._buffer:
+            return 0
+        batch, self._buffer = self._buffer, []
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.graph.query(self.query, {"arestas": batch})
+                break
+            except Exception as e:
+                if not is_transient_error(e) or attempt == self.max_retries:
+                    self._buffer = batch + self._buffer
+                    raise
+                self.retries += 1
+                delay = self.base_delay * (2 ** attempt) * (1 + random.uniform(0, 0.25))
+                print(f"  ⏳ Erro transitório ao gravar {len(batch)} arestas, "
+                      f"nova tentativa em {delay:.1f}s")
+                time.sleep(delay)
+
+        self.written += len(batch)
+        return len(batch)
+
+    def __enter__(self) -> "BulkEdgeWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,116 @@
+"""Diário de progresso para retomar execuções longas"""
+
+from datetime import datetime
+from typing import Iterable, Optional, Set
+
+from src.shared.state import SQLiteStore
+
+# Etapas registradas por arquivo, na ordem do pipeline
+STAGE_READ = "lido"
+STAGE_ENRICHED = "enriquecido"
+STAGE_WRITTEN = "gravado"
+
+
+class RunJournal(SQLiteStore):
+    """
+    Registra quais arquivos concluíram cada etapa de uma execução
+
+    Uma execução interrompida pode ser retomada: os arquivos já gravados são
+    pulados e os demais são reprocessados (semântica at-least-once, segura
+    porque as gravações no grafo são MERGE pelo hash do conteúdo).
+    """
+
+    FILENAME = "journal.db"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS execucoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo TEXT NOT NULL,
+        raiz TEXT NOT NULL,
+        iniciada_em TEXT NOT NULL,
+        concluida_em TEXT
+    );
+    CREATE TABLE IF NOT EXISTS etapas (
+        execucao_id INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        etapa TEXT NOT NULL,
+        concluida_em TEXT NOT NULL,
+        PRIMARY KEY (execucao_id, path, etapa)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.run_id: Optional[int] = None
+        self._written: Set[str] = set()
+
+    def open_run(self, kind: str, root: str, resume: bool = False) -> int:
+        """
+        Inicia uma execução, ou retoma a última execução inacabada
+
+        Args:
+            kind: Tipo da execução (ex: 'ingest', 'index')
+            root: Diretório raiz processado
+            resume: Se True, continua a última execução não concluída de
+                mesmo tipo e raiz (se existir)
+
+        Returns:
+            Identificador da execução
+        """
+        with self._lock, self._conn:
+            row = None
+            if resume:
+                row = self._conn.execute("""
+                SELECT id FROM execucoes
+                WHERE tipo = ? AND raiz = ? AND concluida_em IS NULL
+                ORDER BY id DESC LIMIT 1
+                """, (kind, root)).fetchone()
+
+            if row:
+                self.run_id = row[0]
+                self._written = {
+                    r[0] for r in self._conn.execute("""
+                    SELECT path FROM etapas WHERE execucao_id = ? AND etapa = ?
+                    """, (self.run_id, STAGE_WRITTEN))
+                }
+            else:
+                self.run_id = self._conn.execute("""
+                INSERT INTO execucoes (tipo, raiz, iniciada_em) VALUES (?, ?, ?)
+                """, (kind, root, datetime.now().isoformat())).lastrowid
+                self._written = set()
+
+        return self.run_id
+
+    @property
+    def resumed_count(self) -> int:
+        """Arquivos já gravados herdados da execução retomada"""
+        return len(self._written)
+
+    def is_written(self, path: str) -> bool:
+        """Verifica se o arquivo já foi gravado nesta execução"""
+        return path in self._written
+
+    def mark(self, paths: Iterable[str], stage: str) -> None:
+        """Registra que os arquivos concluíram uma etapa"""
+        if self.run_id is None:
+            return
+        now = datetime.now().isoformat()
+        rows = [(self.run_id, path, stage, now) for path in paths]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+            INSERT OR REPLACE INTO etapas (execucao_id, path, etapa, concluida_em)
+            VALUES (?, ?, ?, ?)
+            """, rows)
+            if stage == STAGE_WRITTEN:
+                self._written.update(r[1] for r in rows)
+
+    def finish(self) -> None:
+        """Marca a execução como concluída e descarta seu detalhamento"""
+        if self.run_id is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("""
+            UPDATE execucoes SET concluida_em = ? WHERE id = ?
+            """, (datetime.now().isoformat(), self.run_id))
+            self._conn.execute("DELETE FROM etapas WHERE execucao_id = ?", (self.run_id,))
+        self.run_id = None
+        self._written = set()
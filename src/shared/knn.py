@@ -0,0 +1,178 @@
+"""Grafo kNN exato em memória, com produtos de matrizes em blocos (NumPy opcional)"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Bytes de memória de trabalho por linha de bloco e por coluna da matriz:
+# similaridades (float32) + índices do argpartition (int64) + cópia negada (float32)
+_BYTES_PER_CELL = 16
+
+
+def require_numpy():
+    """Importa o NumPy, com uma mensagem clara quando o extra não está instalado"""
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError(
+            "A engine 'numpy' requer o NumPy: pip install 'neo4j-langraph[knn]'"
+        ) from None
+    return np
+
+
+def cosine_to_score(cosine):
+    """
+    Converte cosseno (-1 a 1) na escala do índice vetorial do Neo4j, (1 + cos) / 2
+
+    Assim limiares e RELACIONADO_A.score significam o mesmo em todas as engines.
+    """
+    return (1 + cosine) / 2
+
+
+def load_embeddings(graph, label: str = "Item", property_name: str = "embedding",
+                    key: str = "id", page_size: int = 2000) -> Tuple[List[Any], Any]:
+    """
+    Lê os embeddings de um label em páginas e monta uma matriz float32 normalizada
+
+    A paginação é por chave (key > última chave lida), então cada página é
+    uma busca indexada e só uma página de listas Python fica em memória.
+
+    Args:
+        graph: Conexão Neo4jGraph
+        label: Label dos nós
+        property_name: Propriedade com o embedding
+        key: Propriedade única usada para paginar e identificar os nós
+        page_size: Nós lidos por query
+
+    Returns:
+        Tupla (chaves, matriz N x d com linhas de norma 1)
+    """
+    np = require_numpy()
+    keys: List[Any] = []
+    blocks = []
+    dimensions = None
+    skipped = 0
+    last = None
+
+    while True:
+        rows = graph.query(f"""
+        MATCH (n:{label})
+        WHERE n.{property_name} IS NOT NULL AND ($last IS NULL OR n.{key} > $last)
+        RETURN n.{key} AS key, n.{property_name} AS embedding
+        ORDER BY n.{key}
+        LIMIT $limit
+        """, {"last": last, "limit": page_size})
+        if not rows:
+            break
+        last = rows[-1]["key"]
+
+        dimensions = dimensions or len(rows[0]["embedding"])
+        page = [r for r in rows if len(r["embedding"]) == dimensions]
+        skipped += len(rows) - len(page)
+        if page:
+            keys.extend(r["key"] for r in page)
+            blocks.append(np.asarray([r["embedding"] for r in page], dtype=np.float32))
+        if len(rows) < page_size:
+            break
+
+    if skipped:
+        print(f"⚠️ {skipped} nós com embedding de dimensão diferente de {dimensions} ignorados")
+    if not blocks:
+        return [], np.zeros((0, 0), dtype=np.float32)
+
+    matrix = np.vstack(blocks)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return keys, matrix
+
+
+def _top_k_block(matrix, rows, k: int, threshold: float):
+    """Top-k vizinhos (score acima do limiar) das linhas `rows` contra a matriz inteira"""
+    np = require_numpy()
+    sims = matrix[rows] @ matrix.T
+    sims[np.arange(len(rows)), rows] = -np.inf  # o próprio nó não é vizinho
+
+    k = min(k, matrix.shape[0] - 1)
+    if k <= 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    neighbors = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    scores = cosine_to_score(np.take_along_axis(sims, neighbors, axis=1))
+    mask = scores > threshold
+    sources = np.broadcast_to(rows[:, None], neighbors.shape)
+    return sources[mask], neighbors[mask], scores[mask]
+
+
+def _top_k_block_from_file(path: str, rows, k: int, threshold: float):
+    """Versão para os processos do pool: lê a matriz mapeada do disco"""
+    np = require_numpy()
+    matrix = np.load(path, mmap_mode="r")
+    return _top_k_block(matrix, rows, k, threshold)
+
+
+def knn_pairs(matrix, k: int = 10, threshold: float = 0.75,
+              memory_mb: int = 512, workers: int = 1,
+              rows: Optional[Sequence[int]] = None):
+    """
+    Calcula os pares de vizinhos mais próximos por similaridade de cosseno
+
+    Os scores seguem a escala do índice vetorial do Neo4j, (1 + cos) / 2.
+
+    As linhas são processadas em blocos cujo tamanho respeita `memory_mb`
+    (dividido entre os processos). Com workers > 1 a matriz é gravada num
+    arquivo temporário e mapeada em memória por cada processo do pool.
+
+    Args:
+        matrix: Matriz N x d float32 com linhas normalizadas
+        k: Vizinhos por nó
+        threshold: Score mínimo ((1 + cos) / 2)
+        memory_mb: Memória de trabalho total para as similaridades de um bloco
+        workers: Processos em paralelo
+        rows: Linhas cujos vizinhos devem ser calculados (padrão: todas)
+
+    Returns:
+        Tupla de arrays (origem, destino, score) com pares não direcionados
+        únicos (origem < destino)
+    """
+    np = require_numpy()
+    n = matrix.shape[0]
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    rows = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+    workers = max(1, workers)
+    budget = memory_mb * 1024 * 1024 // workers
+    block_rows = max(1, min(n, budget // (n * _BYTES_PER_CELL)))
+    blocks = [rows[start:start + block_rows] for start in range(0, len(rows), block_rows)]
+    print(f"🧮 {len(rows)} de {n} vetores, {len(blocks)} blocos de até {block_rows} linhas, "
+          f"{workers} processos")
+    if not blocks:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    if workers == 1:
+        results = [_top_k_block(matrix, block, k, threshold) for block in blocks]
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "matriz.npy")
+            np.save(path, matrix)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_top_k_block_from_file, path, block, k, threshold)
+                    for block in blocks
+                ]
+                results = [future.result() for future in futures]
+
+    sources = np.concatenate([r[0] for r in results])
+    targets = np.concatenate([r[1] for r in results])
+    scores = np.concatenate([r[2] for r in results])
+
+    # A->B e B->A viram um único par
+    low = np.minimum(sources, targets).astype(np.int64)
+    high = np.maximum(sources, targets).astype(np.int64)
+    _, unique = np.unique(low * n + high, return_index=True)
+    return low[unique], high[unique], scores[unique]
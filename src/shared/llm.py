@@ -1,6 +1,8 @@
 """Configuração de LLMs para diferentes casos de uso"""
 
-from typing import Optional
+import json
+import re
+from typing import Any, Optional
 from langchain_openai import ChatOpenAI
 
 from src.config import get_llm
@@ -28,3 +30,21 @@ class LLMConfig:
     def analysis_llm() -> ChatOpenAI:
         """LLM para análise e clusterização (criativo)"""
         return get_llm(model="gpt-4", temperature=0.3)
+
+
+def get_model_name(model: Any) -> str:
+    """Retorna o nome do modelo de um LLM ou de embeddings do LangChain"""
+    return (
+        getattr(model, "model_name", None)
+        or getattr(model, "model", None)
+        or type(model).__name__
+    )
+
+
+def parse_json_response(text: str) -> Any:
+    """Faz o parse do JSON de uma resposta do LLM, removendo cercas ```json se houver"""
+    text = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return json.loads(text)
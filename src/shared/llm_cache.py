@@ -0,0 +1,149 @@
+"""Cache persistente de respostas do LLM"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.shared.state import SQLiteStore
+
+
+class LLMCache(SQLiteStore):
+    """
+    Cache em disco das respostas JSON do LLM
+
+    Chaveado por (hash do conteúdo, versão do prompt, modelo). Quando o
+    tamanho total passa de `max_bytes`, as entradas acessadas há mais tempo
+    são removidas (LRU).
+    """
+
+    FILENAME = "llm_cache.db"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS respostas (
+        content_hash TEXT NOT NULL,
+        prompt_version TEXT NOT NULL,
+        modelo TEXT NOT NULL,
+        resposta TEXT NOT NULL,
+        tamanho INTEGER NOT NULL,
+        criado_em TEXT NOT NULL,
+        acessado_em REAL NOT NULL,
+        PRIMARY KEY (content_hash, prompt_version, modelo)
+    );
+    CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em);
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None,
+                 max_bytes: Optional[int] = None):
+        super().__init__(path)
+        self.max_bytes = max_bytes or int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        with self._lock:
+            self._total_bytes = self._conn.execute(
+                "SELECT coalesce(sum(tamanho), 0) FROM respostas"
+            ).fetchone()[0]
+
+    def get(self, content_hash: str, prompt_version: str, model: str) -> Optional[Dict[str, Any]]:
+        """Retorna a resposta em cache, ou None"""
+        key = (content_hash, prompt_version, model)
+        with self._lock, self._conn:
+            row = self._conn.execute("""
+            SELECT resposta FROM respostas
+            WHERE content_hash = ? AND prompt_version = ? AND modelo = ?
+            """, key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("""
+            UPDATE respostas SET acessado_em = ?
+            WHERE content_hash = ? AND prompt_version = ? AND modelo = ?
+            """, (time.time(), *key))
+        return json.loads(row[0])
+
+    def put(self, content_hash: str, prompt_version: str, model: str,
+            value: Dict[str, Any]) -> None:
+        """Armazena uma resposta já parseada"""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        with self._lock, self._conn:
+            old = self._conn.execute("""
+            SELECT tamanho FROM respostas
+            WHERE content_hash = ? AND prompt_version = ? AND modelo = ?
+            """, (content_hash, prompt_version, model)).fetchone()
+            self._conn.execute("""
+            INSERT OR REPLACE INTO respostas
+                (content_hash, prompt_version, modelo, resposta, tamanho, criado_em, acessado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (content_hash, prompt_version, model, payload, size,
+                  datetime.now().isoformat(), time.time()))
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove as entradas menos usadas até caber em max_bytes (chamar com lock)"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute("""
+            SELECT rowid, tamanho FROM respostas ORDER BY acessado_em ASC LIMIT 100
+            """).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            removed = []
+            for rowid, size in rows:
+                removed.append((rowid,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+            self._conn.executemany("DELETE FROM respostas WHERE rowid = ?", removed)
+
+    def purge(self, prompt_version: Optional[str] = None, model: Optional[str] = None) -> int:
+        """
+        Remove entradas do cache
+
+        Args:
+            prompt_version: Remove apenas esta versão de prompt (opcional)
+            model: Remove apenas este modelo (opcional)
+
+        Returns:
+            Número de entradas removidas
+        """
+        conditions, params = [], []
+        if prompt_version:
+            conditions.append("prompt_version = ?")
+            params.append(prompt_version)
+        if model:
+            conditions.append("modelo = ?")
+            params.append(model)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock, self._conn:
+            removed = self._conn.execute(f"DELETE FROM respostas {where}", params).rowcount
+            self._total_bytes = self._conn.execute(
+                "SELECT coalesce(sum(tamanho), 0) FROM respostas"
+            ).fetchone()[0]
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache"""
+        with self._lock:
+            entries = self._conn.execute("""
+            SELECT prompt_version, modelo, count(*) as qtd, sum(tamanho) as bytes
+            FROM respostas
+            GROUP BY prompt_version, modelo
+            ORDER BY qtd DESC
+            """).fetchall()
+        return {
+            "path": str(self.path),
+            "entradas": sum(e[2] for e in entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "por_prompt": [
+                {"prompt_version": e[0], "modelo": e[1], "qtd": e[2], "bytes": e[3]}
+                for e in entries
+            ],
+        }
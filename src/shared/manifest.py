@@ -0,0 +1,102 @@
+"""Manifesto local de arquivos já ingeridos"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from src.shared.state import SQLiteStore
+
+
+class FileManifest(SQLiteStore):
+    """
+    Registra mtime, tamanho e hash de cada arquivo gravado no grafo
+
+    Permite pular arquivos inalterados antes de ler seu conteúdo.
+    """
+
+    FILENAME = "manifest.db"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS arquivos (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL,
+        tamanho INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        item_id TEXT NOT NULL,
+        atualizado_em TEXT NOT NULL
+    );
+    """
+
+    def is_unchanged(self, path: str, stat: os.stat_result) -> bool:
+        """Verifica se o arquivo tem o mesmo mtime e tamanho da última ingestão"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, tamanho FROM arquivos WHERE path = ?", (path,)
+            ).fetchone()
+        return row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size
+
+    def record_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Registra arquivos gravados com sucesso
+
+        Args:
+            records: Registros com path, mtime_ns, tamanho, hash e id
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (r["path"], r["mtime_ns"], r["tamanho"], r["hash"], r["id"], now)
+            for r in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+            INSERT INTO arquivos (path, mtime_ns, tamanho, hash, item_id, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                mtime_ns = excluded.mtime_ns,
+                tamanho = excluded.tamanho,
+                hash = excluded.hash,
+                item_id = excluded.item_id,
+                atualizado_em = excluded.atualizado_em
+            """, rows)
+
+    def item_ids(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Item registrado para cada caminho já ingerido"""
+        paths = list(paths)
+        result: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(paths), 500):
+                batch = paths[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT path, item_id FROM arquivos WHERE path IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                result.update(rows)
+        return result
+
+    def entries_under(self, root: str) -> List[Tuple[str, str]]:
+        """
+        (caminho, item_id) de todos os arquivos registrados dentro do diretório
+
+        Os caminhos são comparados como foram gravados (str do Path produzido
+        pelo walker), então `root` deve ser o mesmo passado à ingestão.
+        """
+        if os.path.normpath(root) == ".":
+            # Ingestão a partir do diretório atual grava caminhos relativos
+            with self._lock:
+                rows = self._conn.execute("SELECT path, item_id FROM arquivos").fetchall()
+            return [(path, item_id) for path, item_id in rows if not os.path.isabs(path)]
+
+        prefix = os.path.join(root, "")
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, item_id FROM arquivos WHERE path >= ? AND path < ?",
+                (prefix, prefix + "\uffff"),
+            ).fetchall()
+
+    def forget(self, paths: Iterable[str]) -> None:
+        """Remove arquivos do manifesto (ex: apagados do disco)"""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM arquivos WHERE path = ?", [(p,) for p in paths])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM arquivos").fetchone()[0]
@@ -0,0 +1,47 @@
+"""Métricas de execução dos pipelines"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RunStats:
+    """Contadores thread-safe e vazão de uma execução de pipeline"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._start = time.perf_counter()
+        self._end: Optional[float] = None
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Incrementa um contador"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        """Retorna o valor atual de um contador"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def stop(self) -> None:
+        """Marca o fim da execução"""
+        self._end = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """Segundos decorridos desde o início da execução"""
+        end = self._end if self._end is not None else time.perf_counter()
+        return end - self._start
+
+    def throughput(self, name: str) -> float:
+        """Itens por segundo para um contador"""
+        elapsed = self.elapsed
+        return self.get(name) / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """Retorna cópia dos contadores com o tempo decorrido"""
+        with self._lock:
+            data: Dict[str, float] = dict(self._counters)
+        data["segundos"] = round(self.elapsed, 3)
+        return data
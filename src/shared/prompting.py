@@ -0,0 +1,165 @@
+"""Montagem de trechos salientes de documentos dentro de um orçamento de tokens"""
+
+import re
+from typing import List, Optional, Tuple
+
+from src.shared.utils import count_tokens, truncate_to_tokens
+
+# Separador entre trechos não contíguos do documento
+GAP_MARKER = "\n[...]\n"
+
+_FRONT_MATTER = re.compile(r"\A(?:---|\+\+\+)\s*\n.*?\n(?:---|\+\+\+)\s*\n", re.DOTALL)
+_IMPORT_LINE = re.compile(
+    r"^\s*(?:import\s|from\s+\S+\s+import\s|export\s.*\sfrom\s|#include\s|using\s|require\(|"
+    r"(?:const|let|var)\s+\S+\s*=\s*require\()"
+)
+_HEADING_LINE = re.compile(
+    r"^(?:#{1,6}\s+\S|\s*(?:class|def|async\s+def|function|interface|type)\s+\w|"
+    r"\s*export\s+(?:default\s+)?(?:class|function|interface|const)\s+\w|\[[\w.\-]+\]\s*$)"
+)
+_RST_UNDERLINE = re.compile(r"^([=\-~^\"'`#*+])\1{2,}\s*$")
+
+# Prioridades (menor = mais importante)
+_PRIORITY_FRONT_MATTER = 0
+_PRIORITY_FIRST_PARAGRAPH = 1
+_PRIORITY_IMPORTS = 2
+_PRIORITY_HEADING = 3
+_PRIORITY_LAST_PARAGRAPH = 4
+_PRIORITY_BODY = 5
+
+# Fração máxima do orçamento ocupada por títulos, para sobrar espaço para a prosa
+HEADING_BUDGET_SHARE = 0.25
+
+
+def _line_spans(content: str) -> List[Tuple[int, int, str]]:
+    """Retorna (início, fim, linha) de cada linha do texto"""
+    spans = []
+    pos = 0
+    for line in content.splitlines(keepends=True):
+        spans.append((pos, pos + len(line), line))
+        pos += len(line)
+    return spans
+
+
+def _paragraph_spans(content: str, start: int) -> List[Tuple[int, int]]:
+    """Retorna (início, fim) dos parágrafos (blocos separados por linha em branco)"""
+    spans = []
+    for match in re.finditer(r"\S(?:.*?)(?=\n\s*\n|\Z)", content[start:], re.DOTALL):
+        spans.append((start + match.start(), start + match.end()))
+    return spans
+
+
+def _is_prose(text: str) -> bool:
+    """Se o bloco tem texto corrido (não é só títulos nem um bloco de código)"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines or lines[0].lstrip().startswith(("```", "~~~")):
+        return False
+    return not all(_HEADING_LINE.match(line) or _RST_UNDERLINE.match(line) for line in lines)
+
+
+def _candidate_sections(content: str) -> List[Tuple[int, int, int]]:
+    """Lista trechos candidatos como (prioridade, início, fim)"""
+    sections = []
+    body_start = 0
+
+    front = _FRONT_MATTER.match(content)
+    if front:
+        sections.append((_PRIORITY_FRONT_MATTER, 0, front.end()))
+        body_start = front.end()
+
+    lines = _line_spans(content)
+    block: Optional[List[int]] = None
+    in_fence = False
+    for idx, (start, end, line) in enumerate(lines):
+        if start < body_start:
+            continue
+        # Comentários dentro de blocos de código markdown não são títulos
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        if in_fence:
+            continue
+        if _IMPORT_LINE.match(line):
+            block = [block[0], end] if block else [start, end]
+            continue
+        if block:
+            sections.append((_PRIORITY_IMPORTS, block[0], block[1]))
+            block = None
+        if _HEADING_LINE.match(line):
+            sections.append((_PRIORITY_HEADING, start, end))
+        elif idx > 0 and _RST_UNDERLINE.match(line) and lines[idx - 1][2].strip():
+            sections.append((_PRIORITY_HEADING, lines[idx - 1][0], end))
+    if block:
+        sections.append((_PRIORITY_IMPORTS, block[0], block[1]))
+
+    # Primeiro e último parágrafos de texto corrido: um "# Título" isolado ou
+    # um bloco de código no início não tomam o lugar da introdução
+    paragraphs = _paragraph_spans(content, body_start)
+    prose = [idx for idx, (start, end) in enumerate(paragraphs) if _is_prose(content[start:end])]
+    first = prose[0] if prose else None
+    last = prose[-1] if len(prose) > 1 else None
+    for idx, (start, end) in enumerate(paragraphs):
+        if idx == first:
+            priority = _PRIORITY_FIRST_PARAGRAPH
+        elif idx == last:
+            priority = _PRIORITY_LAST_PARAGRAPH
+        else:
+            priority = _PRIORITY_BODY
+        sections.append((priority, start, end))
+
+    return sections
+
+
+def build_salient_excerpt(content: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """
+    Seleciona as partes mais informativas de um documento dentro de um orçamento de tokens
+
+    Documentos que cabem no orçamento são devolvidos inteiros. Nos demais são
+    escolhidos, nesta ordem: front matter, primeiro parágrafo, blocos de
+    imports, títulos (e assinaturas de classes/funções), último parágrafo e,
+    com o orçamento restante, os demais parágrafos na ordem do texto. Títulos
+    ocupam no máximo HEADING_BUDGET_SHARE do orçamento. Os trechos são
+    remontados na ordem original, separados por "[...]".
+
+    Args:
+        content: Conteúdo do documento
+        max_tokens: Orçamento de tokens do trecho
+        model: Modelo alvo, para contar tokens com o encoding correto
+
+    Returns:
+        Trecho do documento que cabe no orçamento
+    """
+    if count_tokens(content, model) <= max_tokens:
+        return content
+
+    budget = max_tokens
+    heading_budget = int(max_tokens * HEADING_BUDGET_SHARE)
+    selected: List[Tuple[int, str]] = []
+    covered: List[Tuple[int, int]] = []
+    gap_tokens = count_tokens(GAP_MARKER, model)
+
+    for priority, start, end in sorted(_candidate_sections(content)):
+        if any(start < e and s < end for s, e in covered):
+            continue
+        text = content[start:end]
+        tokens = count_tokens(text, model) + gap_tokens
+        if priority == _PRIORITY_HEADING and tokens > heading_budget:
+            continue
+        if tokens > budget:
+            # Trechos prioritários grandes entram truncados; os demais são pulados
+            if priority > _PRIORITY_FIRST_PARAGRAPH or budget <= gap_tokens * 2:
+                continue
+            text = truncate_to_tokens(text, budget - gap_tokens, model)
+            tokens = budget
+        selected.append((start, text))
+        covered.append((start, end))
+        budget -= tokens
+        if priority == _PRIORITY_HEADING:
+            heading_budget -= tokens
+        if budget <= gap_tokens:
+            break
+
+    if not selected:
+        return truncate_to_tokens(content, max_tokens, model)
+
+    selected.sort()
+    return GAP_MARKER.join(text.strip("\n") for _, text in selected)
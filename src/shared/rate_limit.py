@@ -0,0 +1,200 @@
+"""Limitador de taxa adaptativo para chamadas de LLM e embeddings"""
+
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Requisições por minuto iniciais (o limitador ajusta conforme as respostas 429)
+DEFAULT_RPM = {
+    "llm": 60,
+    "embeddings": 600,
+}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Verifica se a exceção indica limite de taxa/cota do provedor (HTTP 429)
+
+    Só o status HTTP e o tipo da exceção contam: a mensagem pode citar "429"
+    por outros motivos (ex: um id ou um tamanho de payload).
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status == 429:
+        return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & {"RateLimitError", "ResourceExhausted", "TooManyRequests"})
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Extrai o tempo de espera sugerido pelo provedor, se houver"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            pass
+
+    # Gemini informa "retry in 12.5s" / "retryDelay: 12s" na mensagem
+    match = re.search(r"retry(?:[ _-]?delay)?\D{0,10}(\d+(?:\.\d+)?)\s*s",
+                      str(error), re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket que aprende o limite do provedor
+
+    Um 429 reduz a taxa pela metade e registra a taxa atual como teto;
+    cada sucesso aumenta a taxa aos poucos até perto do teto, que também
+    sobe lentamente para voltar a explorar a cota disponível.
+
+    Cada redução abre uma nova geração: os 429 de requisições liberadas
+    antes dela (a mesma rajada) só esperam, sem reduzir a taxa de novo.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float,
+                 max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.name = name
+        self.rate = requests_per_minute / 60.0  # requisições por segundo
+        self.min_rate = self.rate / 32
+        self.max_rate = self.rate * 2
+        self.ceiling: Optional[float] = None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._generation = 0
+        self._reduced_to: Optional[float] = None  # taxa após a última redução
+        self.rate_limited = 0
+
+    @property
+    def _capacity(self) -> float:
+        # Permite rajadas de até ~1s de requisições
+        return max(1.0, self.rate)
+
+    def acquire(self) -> int:
+        """
+        Bloqueia até haver um token disponível
+
+        Returns:
+            Geração do limitador em que a requisição foi liberada
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity,
+                                   self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+                wait = self._blocked_until - now
+                if wait <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    return self._generation
+                if wait <= 0:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        """Aumento aditivo da taxa após uma chamada bem-sucedida"""
+        with self._lock:
+            target = min(self.max_rate, self.ceiling * 0.9) if self.ceiling else self.max_rate
+            step = self.rate * 0.02
+            if self.rate + step <= target:
+                self.rate += step
+            elif self.ceiling:
+                self.ceiling *= 1.001
+
+    def on_rate_limited(self, retry_after: Optional[float], attempt: int,
+                        generation: Optional[int] = None) -> float:
+        """
+        Redução multiplicativa da taxa após um 429; retorna a espera aplicada
+
+        Args:
+            retry_after: Espera sugerida pelo provedor (segundos)
+            attempt: Tentativa atual (para o backoff exponencial)
+            generation: Geração retornada por acquire() para a requisição;
+                se for anterior à última redução, a taxa não muda
+        """
+        with self._lock:
+            self.rate_limited += 1
+            if generation is None or generation >= self._generation:
+                # Depois de uma redução sem recuperação, a taxa atual já não é
+                # a que causou o limite: o teto fica onde estava
+                if (self.ceiling is None or self._reduced_to is None
+                        or self.rate > self._reduced_to):
+                    self.ceiling = self.rate
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._reduced_to = self.rate
+                self._generation += 1
+            self._tokens = 0.0
+
+            backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+            delay = retry_after if retry_after is not None else backoff
+            delay = delay * (1 + random.uniform(0, 0.25))  # jitter
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            return delay
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Executa uma chamada respeitando o limite e repetindo em caso de 429
+
+        Args:
+            fn: Função que faz a chamada ao provedor
+            *args, **kwargs: Argumentos repassados para `fn`
+
+        Returns:
+            Resultado de `fn`
+
+        Raises:
+            A última exceção, se o limite persistir após max_retries tentativas,
+            ou qualquer erro que não seja de limite de taxa
+        """
+        for attempt in range(self.max_retries + 1):
+            generation = self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = self.on_rate_limited(get_retry_after(e), attempt, generation)
+                print(f"  ⏳ {self.name}: limite de taxa atingido, nova tentativa em {delay:.1f}s "
+                      f"({self.rate * 60:.0f} req/min)")
+                continue
+            self.on_success()
+            return result
+        raise RuntimeError("unreachable")
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(kind: str) -> AdaptiveRateLimiter:
+    """
+    Retorna o limitador compartilhado de um tipo de chamada
+
+    A taxa inicial vem de LLM_RPM_LIMIT / EMBEDDINGS_RPM_LIMIT (req/min).
+
+    Args:
+        kind: 'llm' ou 'embeddings'
+    """
+    with _limiters_lock:
+        if kind not in _limiters:
+            rpm = float(os.getenv(f"{kind.upper()}_RPM_LIMIT", DEFAULT_RPM.get(kind, 60)))
+            _limiters[kind] = AdaptiveRateLimiter(kind, rpm)
+        return _limiters[kind]
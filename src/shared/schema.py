@@ -0,0 +1,172 @@
+"""Constraints e índices do grafo (criação idempotente)"""
+
+import re
+import unicodedata
+import weakref
+from typing import Any, Dict, List, Tuple
+
+# (nome, label, propriedade): chaves usadas nos MERGE, únicas por label
+CONSTRAINTS: List[Tuple[str, str, str]] = [
+    ("item_id", "Item", "id"),
+    ("chunk_id", "Chunk", "id"),
+    ("projeto_nome", "Projeto", "nome"),
+    ("topico_nome", "Topico", "nome"),
+    ("conceito_nome", "Conceito", "nome"),
+    ("tecnologia_nome", "Tecnologia", "nome"),
+    ("tag_nome", "Tag", "nome"),
+    ("stack_nome", "Stack", "nome"),
+    ("tema_nome", "Tema", "nome"),
+    ("cluster_id", "Cluster", "id"),
+    ("estado_nome", "Estado", "nome"),
+]
+
+# (nome, label, propriedade): buscas frequentes em propriedades que não são únicas
+# (Arquivo.path se repete entre as versões de um arquivo)
+RANGE_INDEXES: List[Tuple[str, str, str]] = [
+    ("arquivo_path", "Arquivo", "path"),
+    ("arquivo_status", "Arquivo", "status"),
+    ("item_processado_em", "Item", "processado_em"),
+    ("item_tipo", "Item", "tipo"),
+]
+
+# (nome, tipo da aresta, propriedade)
+RELATIONSHIP_INDEXES: List[Tuple[str, str, str]] = [
+    ("relacionado_descoberto_em", "RELACIONADO_A", "descoberto_em"),
+]
+
+TOPICS_FULLTEXT_INDEX = "topicos_texto"
+ITEMS_FULLTEXT_INDEX = "itens_texto"
+THEMES_FULLTEXT_INDEX = "temas_texto"
+STACKS_FULLTEXT_INDEX = "stacks_texto"
+
+# (nome, labels, propriedades): busca textual sem diferenciar acentos e maiúsculas
+FULLTEXT_INDEXES: List[Tuple[str, List[str], List[str]]] = [
+    (TOPICS_FULLTEXT_INDEX, ["Topico", "Conceito", "Tag"], ["nome"]),
+    (ITEMS_FULLTEXT_INDEX, ["Item"], ["nome", "contexto"]),
+    (THEMES_FULLTEXT_INDEX, ["Tema"], ["nome"]),
+    (STACKS_FULLTEXT_INDEX, ["Stack"], ["nome"]),
+]
+
+FULLTEXT_ANALYZER = "standard-folding"
+
+# Termos curtos com busca aproximada casam com quase tudo
+MIN_FUZZY_TERM_LENGTH = 4
+
+# Espera máxima (segundos) pela população de índices criados sob demanda
+INDEX_WAIT_SECONDS = 300
+
+# Conexões cujo schema já foi verificado nesta execução
+_ensured_graphs: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas e sem acentos, como o analyzer standard-folding"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def fulltext_query(text: str, fuzzy: bool = False, prefix: bool = True) -> str:
+    """
+    Monta uma consulta Lucene segura para os índices full-text
+
+    Termos com curinga ou aproximação não passam pelo analyzer do índice,
+    então o texto é normalizado aqui; a pontuação é descartada, o que
+    também evita injetar sintaxe Lucene.
+
+    Args:
+        text: Texto digitado pelo usuário
+        fuzzy: Se True, aceita erros de digitação (distância de edição até 2)
+        prefix: Se True, cada termo casa também como prefixo ("djang" -> "django")
+
+    Returns:
+        Consulta com todos os termos obrigatórios ('' se não houver termos)
+    """
+    parts = []
+    for term in re.findall(r"\w+", fold_text(text)):
+        options = [f"{term}*" if prefix else term]
+        if fuzzy and len(term) >= MIN_FUZZY_TERM_LENGTH:
+            options.append(f"{term}~")
+        parts.append(options[0] if len(options) == 1 else f"({' OR '.join(options)})")
+    return " AND ".join(parts)
+
+
+def schema_statements() -> List[Tuple[str, str]]:
+    """Lista de (nome, comando Cypher) de todo o schema esperado"""
+    statements = []
+    for name, label, prop in CONSTRAINTS:
+        statements.append((name, f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                                  f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"))
+    for name, label, prop in RANGE_INDEXES:
+        statements.append((name, f"CREATE INDEX {name} IF NOT EXISTS "
+                                  f"FOR (n:{label}) ON (n.{prop})"))
+    for name, rel_type, prop in RELATIONSHIP_INDEXES:
+        statements.append((name, f"CREATE INDEX {name} IF NOT EXISTS "
+                                  f"FOR ()-[r:{rel_type}]-() ON (r.{prop})"))
+    for name, labels, props in FULLTEXT_INDEXES:
+        fields = ", ".join(f"n.{prop}" for prop in props)
+        statements.append((name, f"CREATE FULLTEXT INDEX {name} IF NOT EXISTS "
+                                  f"FOR (n:{'|'.join(labels)}) ON EACH [{fields}] "
+                                  f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: "
+                                  f"'{FULLTEXT_ANALYZER}'}}}}"))
+    return statements
+
+
+def existing_schema(graph) -> set:
+    """Nomes das constraints e índices já existentes no banco"""
+    names = {row["name"] for row in graph.query("SHOW CONSTRAINTS YIELD name RETURN name")}
+    names.update(row["name"] for row in graph.query("SHOW INDEXES YIELD name RETURN name"))
+    return names
+
+
+def ensure_schema(graph, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Cria as constraints e índices que ainda não existem
+
+    Falhas não interrompem o restante (ex: uma constraint de unicidade não
+    pode ser criada enquanto houver nós duplicados); elas são listadas no
+    resultado e no console.
+
+    Args:
+        graph: Conexão Neo4jGraph
+        verbose: Se True, lista também o que já existia
+
+    Returns:
+        Dict com as listas 'criados', 'existentes' e 'falhas' (nome, erro)
+    """
+    existing = existing_schema(graph)
+    result: Dict[str, Any] = {"criados": [], "existentes": [], "falhas": []}
+
+    for name, statement in schema_statements():
+        if name in existing:
+            result["existentes"].append(name)
+            if verbose:
+                print(f"  ✓ {name}")
+            continue
+        try:
+            graph.query(statement)
+        except Exception as e:
+            result["falhas"].append((name, str(e)))
+            print(f"  ⚠️ Não foi possível criar {name}: {e}")
+            continue
+        result["criados"].append(name)
+        print(f"  🗂️ {name} criado")
+
+    if result["criados"]:
+        print(f"✅ Schema: {len(result['criados'])} constraints/índices criados")
+    return result
+
+
+def ensure_schema_once(graph) -> None:
+    """
+    Garante o schema antes da primeira busca que depende dele
+
+    Bancos criados antes dos índices full-text não exigem rodar o comando
+    'schema' à mão: na primeira chamada por conexão os índices que faltam são
+    criados e a busca espera que fiquem online.
+    """
+    if graph in _ensured_graphs:
+        return
+    result = ensure_schema(graph)
+    if result["criados"]:
+        graph.query("CALL db.awaitIndexes($timeout)", {"timeout": INDEX_WAIT_SECONDS})
+    _ensured_graphs.add(graph)
@@ -0,0 +1,210 @@
+"""Índice local de assinaturas MinHash para detectar quase-duplicatas"""
+
+import hashlib
+import re
+import zlib
+from array import array
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from src.shared.state import SQLiteStore
+
+# 64 permutações em 16 bandas de 4 linhas: pares com Jaccard acima de ~0.5
+# viram candidatos; a similaridade estimada decide o resto
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+SHINGLE_WORDS = 5
+
+# Textos maiores são assinados pelo início e pelo fim (metade do limite cada),
+# o que mantém o custo da assinatura constante em arquivos grandes
+SKETCH_MAX_CHARS = 8000
+
+# Primo de Mersenne de 31 bits: a * x + b cabe em 64 bits, então o NumPy
+# calcula as permutações sem estourar e o Python puro chega ao mesmo valor
+_PRIME = (1 << 31) - 1
+_SHINGLE_BASE = 1000003
+
+# Muda quando o cálculo da assinatura muda (assinaturas antigas não são comparáveis)
+SIGNATURE_VERSION = 2
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    """Coeficientes (a, b) fixos das funções de hash, iguais em todas as execuções"""
+    coefficients = []
+    for i in range(NUM_PERM):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+_PERMUTATIONS = _permutations()
+
+
+def _load_numpy():
+    """NumPy, se instalado (sem ele as assinaturas saem iguais, só mais devagar)"""
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    return np
+
+
+_np = _load_numpy()
+
+# Coeficientes como colunas (NUM_PERM x 1) para calcular todas as permutações de uma vez
+_COEFFICIENTS = (
+    (_np.array([a for a, _ in _PERMUTATIONS], dtype=_np.uint64)[:, None],
+     _np.array([b for _, b in _PERMUTATIONS], dtype=_np.uint64)[:, None])
+    if _np is not None else None
+)
+
+
+def _word_hashes(text: str) -> List[int]:
+    """Hash de cada palavra do trecho assinado do texto (cada palavra distinta é hasheada uma vez)"""
+    if len(text) > SKETCH_MAX_CHARS:
+        half = SKETCH_MAX_CHARS // 2
+        text = text[:half] + "\n" + text[-half:]
+    known: dict = {}
+    hashes = []
+    for word in re.findall(r"\w+", text.lower()):
+        value = known.get(word)
+        if value is None:
+            value = known[word] = zlib.crc32(word.encode()) % _PRIME
+        hashes.append(value)
+    return hashes or [0]
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    """Conjunto de hashes das sequências de `size` palavras do texto"""
+    words = _word_hashes(text)
+    size = min(size, len(words))
+    values = set()
+    for i in range(len(words) - size + 1):
+        value = 0
+        for word in words[i:i + size]:
+            value = (value * _SHINGLE_BASE + word) % _PRIME
+        values.add(value)
+    return values
+
+
+def minhash_signature(text: str) -> List[int]:
+    """Assinatura MinHash (NUM_PERM inteiros de 31 bits) das shingles do texto"""
+    if _np is None:
+        values = shingles(text)
+        return [min((a * x + b) % _PRIME for x in values) for a, b in _PERMUTATIONS]
+
+    np = _np
+    words = np.array(_word_hashes(text), dtype=np.uint64)
+    size = min(SHINGLE_WORDS, len(words))
+    count = len(words) - size + 1
+    values = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        values = (values * _SHINGLE_BASE + words[offset:offset + count]) % _PRIME
+    values = np.unique(values)
+    a, b = _COEFFICIENTS
+    return ((a * values + b) % _PRIME).min(axis=1).tolist()
+
+
+def estimate_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimativa da similaridade de Jaccard entre dois textos pelas assinaturas"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _band_keys(signature: Sequence[int]) -> List[Tuple[int, int]]:
+    """Chave de cada banda da assinatura (LSH)"""
+    keys = []
+    for band in range(BANDS):
+        rows = array("I", signature[band * ROWS:(band + 1) * ROWS]).tobytes()
+        key = int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "big", signed=True)
+        keys.append((band, key))
+    return keys
+
+
+class SketchIndex(SQLiteStore):
+    """
+    Assinaturas MinHash dos Items, com bandas LSH indexadas
+
+    Uma consulta lê só os Items que compartilham ao menos uma banda com a
+    assinatura (uma busca indexada por banda) e confirma a similaridade
+    comparando as assinaturas. Cada caminho guarda só a assinatura da sua
+    versão mais recente, para que um arquivo editado não case com a versão
+    anterior de si mesmo.
+    """
+
+    FILENAME = f"sketches-v{SIGNATURE_VERSION}.db"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS assinaturas (
+        item_id TEXT PRIMARY KEY,
+        hash TEXT NOT NULL,
+        path TEXT NOT NULL,
+        assinatura BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS bandas (
+        banda INTEGER NOT NULL,
+        chave INTEGER NOT NULL,
+        item_id TEXT NOT NULL,
+        PRIMARY KEY (banda, chave, item_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_assinaturas_path ON assinaturas(path);
+    CREATE INDEX IF NOT EXISTS idx_bandas_item ON bandas(item_id);
+    """
+
+    def query(self, signature: Sequence[int], threshold: float = 0.8,
+              exclude: Iterable[str] = (),
+              path: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """
+        Busca Items quase idênticos
+
+        Args:
+            signature: Assinatura MinHash do texto
+            threshold: Similaridade de Jaccard estimada mínima
+            exclude: Ids de Items a desconsiderar (ex: o próprio Item)
+            path: Caminho do arquivo consultado; versões anteriores dele são ignoradas
+
+        Returns:
+            Lista de (item_id, hash, similaridade), da mais similar para a menos
+        """
+        keys = _band_keys(signature)
+        placeholders = ",".join("(?, ?)" for _ in keys)
+        params = [v for key in keys for v in key]
+        with self._lock:
+            rows = self._conn.execute(f"""
+            SELECT a.item_id, a.hash, a.path, a.assinatura FROM assinaturas a
+            WHERE a.item_id IN (
+                SELECT item_id FROM bandas WHERE (banda, chave) IN (VALUES {placeholders})
+            )
+            """, params).fetchall()
+
+        excluded = set(exclude)
+        matches = []
+        for item_id, content_hash, item_path, blob in rows:
+            if item_id in excluded or (path is not None and item_path == path):
+                continue
+            similarity = estimate_similarity(signature, array("I", blob))
+            if similarity >= threshold:
+                matches.append((item_id, content_hash, similarity))
+        matches.sort(key=lambda m: m[2], reverse=True)
+        return matches
+
+    def add(self, item_id: str, content_hash: str, path: str, signature: Sequence[int]) -> None:
+        """Registra (ou substitui) a assinatura de um Item e descarta a da versão anterior do caminho"""
+        with self._lock, self._conn:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT item_id FROM assinaturas WHERE path = ? OR item_id = ?", (path, item_id)
+            )]
+            self._conn.executemany("DELETE FROM bandas WHERE item_id = ?", [(i,) for i in stale])
+            self._conn.executemany("DELETE FROM assinaturas WHERE item_id = ?", [(i,) for i in stale])
+            self._conn.execute("""
+            INSERT INTO assinaturas (item_id, hash, path, assinatura)
+            VALUES (?, ?, ?, ?)
+            """, (item_id, content_hash, path, array("I", signature).tobytes()))
+            self._conn.executemany("""
+            INSERT OR IGNORE INTO bandas (banda, chave, item_id) VALUES (?, ?, ?)
+            """, [(band, key, item_id) for band, key in _band_keys(signature)])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM assinaturas").fetchone()[0]
@@ -0,0 +1,36 @@
+"""Armazenamento local em SQLite para o estado dos pipelines"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+from src.config import StateConfig
+
+
+class SQLiteStore:
+    """
+    Base para os stores locais (manifesto, caches, checkpoints)
+
+    Subclasses definem FILENAME e SCHEMA. A conexão é compartilhada entre
+    threads e protegida por um lock.
+    """
+
+    FILENAME = "state.db"
+    SCHEMA = ""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else StateConfig.get_state_dir() / self.FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Fecha a conexão com o banco"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,304 @@
+"""Extração local de tecnologias a partir de imports e manifestos de projeto"""
+
+import ast
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# Nome de módulo/pacote (minúsculo, "_" -> "-") -> nome canônico da tecnologia
+KNOWN_TECHNOLOGIES: Dict[str, str] = {
+    # Python
+    "django": "Django",
+    "djangorestframework": "Django REST Framework",
+    "rest-framework": "Django REST Framework",
+    "fastapi": "FastAPI",
+    "flask": "Flask",
+    "starlette": "Starlette",
+    "uvicorn": "Uvicorn",
+    "gunicorn": "Gunicorn",
+    "celery": "Celery",
+    "pydantic": "Pydantic",
+    "sqlalchemy": "SQLAlchemy",
+    "alembic": "Alembic",
+    "psycopg2": "PostgreSQL",
+    "psycopg2-binary": "PostgreSQL",
+    "psycopg": "PostgreSQL",
+    "asyncpg": "PostgreSQL",
+    "pymysql": "MySQL",
+    "pymongo": "MongoDB",
+    "motor": "MongoDB",
+    "redis": "Redis",
+    "neo4j": "Neo4j",
+    "elasticsearch": "Elasticsearch",
+    "boto3": "AWS",
+    "numpy": "NumPy",
+    "pandas": "pandas",
+    "polars": "Polars",
+    "scipy": "SciPy",
+    "sklearn": "scikit-learn",
+    "scikit-learn": "scikit-learn",
+    "torch": "PyTorch",
+    "tensorflow": "TensorFlow",
+    "keras": "Keras",
+    "transformers": "Hugging Face Transformers",
+    "sentence-transformers": "Sentence Transformers",
+    "openai": "OpenAI",
+    "anthropic": "Anthropic",
+    "langchain": "LangChain",
+    "langgraph": "LangGraph",
+    "litellm": "LiteLLM",
+    "ollama": "Ollama",
+    "streamlit": "Streamlit",
+    "matplotlib": "Matplotlib",
+    "requests": "Requests",
+    "httpx": "HTTPX",
+    "aiohttp": "aiohttp",
+    "scrapy": "Scrapy",
+    "bs4": "BeautifulSoup",
+    "beautifulsoup4": "BeautifulSoup",
+    "selenium": "Selenium",
+    "playwright": "Playwright",
+    "pytest": "pytest",
+    "yaml": "YAML",
+    "pyyaml": "YAML",
+    "click": "Click",
+    "typer": "Typer",
+    "kafka": "Kafka",
+    "kafka-python": "Kafka",
+    "pika": "RabbitMQ",
+    # JavaScript / TypeScript
+    "react": "React",
+    "react-dom": "React",
+    "next": "Next.js",
+    "vue": "Vue",
+    "nuxt": "Nuxt",
+    "@angular/core": "Angular",
+    "svelte": "Svelte",
+    "express": "Express",
+    "@nestjs/core": "NestJS",
+    "fastify": "Fastify",
+    "axios": "Axios",
+    "typescript": "TypeScript",
+    "vite": "Vite",
+    "webpack": "webpack",
+    "jest": "Jest",
+    "vitest": "Vitest",
+    "tailwindcss": "Tailwind CSS",
+    "prisma": "Prisma",
+    "@prisma/client": "Prisma",
+    "mongoose": "MongoDB",
+    "pg": "PostgreSQL",
+    "mysql2": "MySQL",
+    "ioredis": "Redis",
+    "neo4j-driver": "Neo4j",
+    "graphql": "GraphQL",
+    "@apollo/client": "Apollo",
+    "socket.io": "Socket.IO",
+    "electron": "Electron",
+    "react-native": "React Native",
+    # Imagens base de Dockerfile
+    "python": "Python",
+    "node": "Node.js",
+    "postgres": "PostgreSQL",
+    "mysql": "MySQL",
+    "mongo": "MongoDB",
+    "nginx": "Nginx",
+    "golang": "Go",
+    "openjdk": "Java",
+    "eclipse-temurin": "Java",
+}
+
+# Prefixos de pacotes que formam famílias (langchain-openai, langchain_core...)
+KNOWN_PREFIXES = {
+    "langchain": "LangChain",
+    "@langchain/": "LangChain",
+    "django-": "Django",
+    "flask-": "Flask",
+    "@nestjs/": "NestJS",
+    "@angular/": "Angular",
+}
+
+_JS_IMPORT = re.compile(
+    r"""(?:\bimport\s+(?:[\w*{}\s,$]+\s+from\s+)?|\bexport\s+[\w*{}\s,$]+\s+from\s+|"""
+    r"""\brequire\s*\(\s*|\bimport\s*\(\s*)["']([^"']+)["']"""
+)
+_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+_DOCKER_FROM = re.compile(r"^\s*FROM\s+(?:--\S+\s+)*([^\s:@]+)", re.IGNORECASE | re.MULTILINE)
+
+
+def normalize_technology(name: str) -> Optional[str]:
+    """Converte um nome de módulo/pacote no nome canônico da tecnologia (ou None)"""
+    key = name.strip().lower().replace("_", "-")
+    if key in KNOWN_TECHNOLOGIES:
+        return KNOWN_TECHNOLOGIES[key]
+    for prefix, technology in KNOWN_PREFIXES.items():
+        if key.startswith(prefix):
+            return technology
+    return None
+
+
+def _canonical(names: Iterable[str]) -> List[str]:
+    """Normaliza e remove duplicatas preservando a ordem"""
+    result: List[str] = []
+    for name in names:
+        technology = normalize_technology(name)
+        if technology and technology not in result:
+            result.append(technology)
+    return result
+
+
+def python_imports(content: str) -> List[str]:
+    """Módulos de primeiro nível importados por um código Python"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return []
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module.split(".")[0])
+    return modules
+
+
+def js_imports(content: str) -> List[str]:
+    """Pacotes importados por um código JavaScript/TypeScript (ignora caminhos relativos)"""
+    packages = []
+    for spec in _JS_IMPORT.findall(content):
+        if spec.startswith((".", "/")) or spec.startswith("node:"):
+            continue
+        parts = spec.split("/")
+        packages.append("/".join(parts[:2]) if spec.startswith("@") else parts[0])
+    return packages
+
+
+def requirements_packages(content: str) -> List[str]:
+    """Pacotes declarados em um requirements.txt"""
+    packages = []
+    for line in content.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        match = _REQUIREMENT_NAME.match(line)
+        if match:
+            packages.append(match.group(1))
+    return packages
+
+
+def pyproject_packages(content: str) -> List[str]:
+    """Pacotes declarados em um pyproject.toml (PEP 621 e Poetry)"""
+    data = None
+    if tomllib is not None:
+        try:
+            data = tomllib.loads(content)
+        except tomllib.TOMLDecodeError:
+            pass
+    if data is None:
+        # Sem tomllib (ou TOML inválido): considerar as strings de dependência entre aspas
+        return [m.group(1) for m in re.finditer(r'^\s*"([A-Za-z0-9][A-Za-z0-9._-]*)', content,
+                                                re.MULTILINE)]
+
+    specs: List[str] = []
+    project = data.get("project", {})
+    specs.extend(project.get("dependencies", []))
+    for group in project.get("optional-dependencies", {}).values():
+        specs.extend(group)
+    poetry = data.get("tool", {}).get("poetry", {})
+    specs.extend(poetry.get("dependencies", {}).keys())
+    specs.extend(poetry.get("dev-dependencies", {}).keys())
+
+    packages = []
+    for spec in specs:
+        match = _REQUIREMENT_NAME.match(str(spec))
+        if match:
+            packages.append(match.group(1))
+    return packages
+
+
+def package_json_packages(content: str) -> List[str]:
+    """Pacotes declarados em um package.json"""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return []
+    if not isinstance(data, dict):
+        return []
+    packages = []
+    for key in ("dependencies", "devDependencies", "peerDependencies"):
+        section = data.get(key)
+        if isinstance(section, dict):
+            packages.extend(section.keys())
+    return packages
+
+
+def dockerfile_images(content: str) -> List[str]:
+    """Imagens base (sem registry/tag) usadas em um Dockerfile"""
+    return [image.rsplit("/", 1)[-1] for image in _DOCKER_FROM.findall(content)]
+
+
+def extract_technologies(file_path: Path, content: str) -> List[str]:
+    """
+    Extrai as tecnologias usadas por um arquivo de código ou manifesto
+
+    Apenas nomes conhecidos (KNOWN_TECHNOLOGIES) são retornados, para não
+    transformar módulos locais em tecnologias.
+
+    Args:
+        file_path: Caminho do arquivo
+        content: Conteúdo do arquivo
+
+    Returns:
+        Nomes canônicos das tecnologias, sem repetição
+    """
+    name = file_path.name.lower()
+    suffix = file_path.suffix.lower()
+
+    if name == "package.json":
+        return _canonical(["node"] + package_json_packages(content))
+    if name == "pyproject.toml":
+        return _canonical(["python"] + pyproject_packages(content))
+    if name.startswith("requirements") and suffix == ".txt":
+        return _canonical(["python"] + requirements_packages(content))
+    if name == "dockerfile" or name.startswith("dockerfile.") or suffix == ".dockerfile":
+        return ["Docker"] + [t for t in _canonical(dockerfile_images(content)) if t != "Docker"]
+    if suffix == ".py":
+        return _canonical(python_imports(content))
+    if suffix in (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs"):
+        return _canonical(js_imports(content))
+    return []
+
+
+# Manifestos procurados na raiz de um projeto
+PROJECT_MANIFESTS = ("pyproject.toml", "requirements.txt", "package.json", "Dockerfile")
+
+
+def extract_project_stacks(root: Path) -> List[str]:
+    """
+    Extrai a stack de um projeto a partir dos manifestos na sua raiz
+
+    Args:
+        root: Diretório raiz do projeto
+
+    Returns:
+        Nomes canônicos das tecnologias declaradas, sem repetição
+    """
+    stacks: List[str] = []
+    for name in PROJECT_MANIFESTS:
+        manifest = Path(root) / name
+        if not manifest.is_file():
+            continue
+        try:
+            content = manifest.read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            continue
+        for technology in extract_technologies(manifest, content):
+            if technology not in stacks:
+                stacks.append(technology)
+    return stacks
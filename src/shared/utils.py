@@ -1,8 +1,12 @@
 """Funções utilitárias compartilhadas"""
 
 import hashlib
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
 
 
 def generate_hash(content: str) -> str:
@@ -24,10 +28,11 @@ def read_file_content(file_path: Path, encoding: str = 'utf-8',
         Conteúdo do arquivo ou None em caso de erro
     """
     try:
-        content = file_path.read_text(encoding=encoding, errors='ignore')
-        if max_length and len(content) > max_length:
-            return content[:max_length]
-        return content
+        if max_length:
+            # Lê só o necessário, sem carregar arquivos grandes inteiros
+            with open(file_path, encoding=encoding, errors='ignore') as f:
+                return f.read(max_length)
+        return file_path.read_text(encoding=encoding, errors='ignore')
     except Exception as e:
         print(f"⚠️ Erro ao ler {file_path}: {e}")
         return None
@@ -43,8 +48,79 @@ def is_text_file(file_path: Path) -> bool:
     return file_path.suffix.lower() in text_extensions
 
 
+def is_doc_file(file_path: Path) -> bool:
+    """Verifica se arquivo é documentação (.md, .rst, README*, CHANGELOG*)"""
+    name = file_path.name.upper()
+    return (
+        file_path.suffix.lower() in {'.md', '.rst'}
+        or name.startswith('README')
+        or name.startswith('CHANGELOG')
+    )
+
+
 def format_timestamp(dt) -> str:
     """Formata timestamp para string ISO"""
     if hasattr(dt, 'isoformat'):
         return dt.isoformat()
     return str(dt)
+
+
+def iter_batches(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Agrupa um iterável em listas de até `size` elementos"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, max(1, size)))
+        if not batch:
+            return
+        yield batch
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: Optional[str]):
+    """Carrega o encoding do tiktoken, ou None se indisponível"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Sem acesso ao arquivo BPE (ex: ambiente offline)
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Conta tokens de um texto
+
+    Usa tiktoken quando disponível (instalado junto com langchain-openai);
+    caso contrário estima ~4 caracteres por token.
+
+    Args:
+        text: Texto a medir
+        model: Nome do modelo para escolher o encoding (opcional)
+
+    Returns:
+        Número (estimado) de tokens
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Corta um texto para caber em `max_tokens` tokens do modelo"""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
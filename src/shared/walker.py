@@ -0,0 +1,176 @@
+"""Varredura de diretórios com regras de ignore (.gitignore e afins)"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+# Diretórios que nunca contêm conhecimento útil
+DEFAULT_IGNORED_DIRS = frozenset({
+    ".git", ".hg", ".svn",
+    "node_modules", "bower_components",
+    ".venv", "venv", "env", "site-packages", ".eggs",
+    "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox",
+    ".idea", ".cache", "dist", "build",
+})
+
+# Arquivos de ignore lidos em cada diretório (sintaxe do .gitignore)
+DEFAULT_IGNORE_FILES = (".gitignore", ".neo4jignore")
+
+
+class IgnoreRule:
+    """Uma linha de um arquivo de ignore, relativa ao diretório onde foi definida"""
+
+    def __init__(self, pattern: str, base: str):
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        elif pattern.startswith("\\"):
+            pattern = pattern[1:]
+
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+
+        # Com "/" no meio o padrão é ancorado no diretório do arquivo de ignore;
+        # sem "/" vale para o nome em qualquer profundidade
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+
+        self.base = base
+        prefix = "" if anchored else "(?:.*/)?"
+        self.regex = re.compile(f"^{prefix}{self._translate(pattern)}$")
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Converte um glob do .gitignore em expressão regular"""
+        out = []
+        i, n = 0, len(pattern)
+        while i < n:
+            c = pattern[i]
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+            elif pattern.startswith("/**", i) and i + 3 == n:
+                out.append("/.*")
+                i += 3
+            elif pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+            elif c == "*":
+                out.append("[^/]*")
+                i += 1
+            elif c == "?":
+                out.append("[^/]")
+                i += 1
+            elif c == "[":
+                end = pattern.find("]", i + 1)
+                if end == -1:
+                    out.append(re.escape(c))
+                    i += 1
+                else:
+                    body = pattern[i + 1:end].replace("\\", "\\\\")
+                    if body.startswith("!"):
+                        body = "^" + body[1:]
+                    out.append(f"[{body}]")
+                    i = end + 1
+            elif c == "\\" and i + 1 < n:
+                out.append(re.escape(pattern[i + 1]))
+                i += 2
+            else:
+                out.append(re.escape(c))
+                i += 1
+        return "".join(out)
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        """Verifica o caminho (relativo à raiz da varredura, com "/")"""
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return bool(self.regex.match(rel_path))
+
+
+def load_ignore_rules(directory: Path, base: str,
+                      ignore_files: Sequence[str] = DEFAULT_IGNORE_FILES) -> List[IgnoreRule]:
+    """Lê as regras dos arquivos de ignore presentes em um diretório"""
+    rules = []
+    for name in ignore_files:
+        ignore_path = directory / name
+        if not ignore_path.is_file():
+            continue
+        try:
+            lines = ignore_path.read_text(encoding="utf-8", errors="ignore").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            line = line.rstrip()
+            if line and not line.startswith("#"):
+                rules.append(IgnoreRule(line, base))
+    return rules
+
+
+def is_ignored(rules: Sequence[IgnoreRule], rel_path: str, is_dir: bool) -> bool:
+    """Aplica as regras em ordem; a última que casar decide (como no git)"""
+    ignored = False
+    for rule in rules:
+        if rule.negate == ignored and rule.matches(rel_path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def walk_files(root: Path,
+               file_filter: Optional[Callable[[Path], bool]] = None,
+               ignored_dirs: Sequence[str] = DEFAULT_IGNORED_DIRS,
+               ignore_files: Sequence[str] = DEFAULT_IGNORE_FILES) -> Iterator[Path]:
+    """
+    Percorre um diretório com os.scandir, produzindo arquivos à medida que são encontrados
+
+    Diretórios ignorados (lista padrão, virtualenvs e regras de .gitignore /
+    .neo4jignore) são podados antes de serem abertos.
+
+    Args:
+        root: Diretório raiz
+        file_filter: Função que decide se um arquivo deve ser produzido
+        ignored_dirs: Nomes de diretórios sempre ignorados
+        ignore_files: Nomes dos arquivos de regras lidos em cada diretório
+
+    Yields:
+        Caminhos dos arquivos aceitos
+    """
+    root = Path(root)
+    stack: List[Tuple[Path, str, List[IgnoreRule]]] = [(root, "", [])]
+
+    while stack:
+        directory, rel_dir, parent_rules = stack.pop()
+        rules = parent_rules + load_ignore_rules(directory, rel_dir, ignore_files)
+
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"⚠️ Erro ao listar {directory}: {e}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in ignored_dirs or is_ignored(rules, rel_path, True):
+                        continue
+                    if os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):
+                        continue
+                    subdirs.append((Path(entry.path), rel_path, rules))
+                elif entry.is_file():
+                    if is_ignored(rules, rel_path, False):
+                        continue
+                    file_path = Path(entry.path)
+                    if file_filter is None or file_filter(file_path):
+                        yield file_path
+            except OSError:
+                continue
+
+        # Empilhar em ordem reversa para visitar os subdiretórios em ordem alfabética
+        stack.extend(reversed(subdirs))
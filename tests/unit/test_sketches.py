@@ -0,0 +1,51 @@
+"""Testes das assinaturas MinHash (src/shared/sketches.py)"""
+
+import random
+import time
+
+import pytest
+
+from src.shared import sketches
+from src.shared.sketches import estimate_similarity, minhash_signature
+
+# Orçamento por assinatura com NumPy; folgado para máquinas de CI lentas,
+# mas ordens de grandeza abaixo do cálculo em Python puro
+SIGNATURE_BUDGET_SECONDS = 0.005
+
+
+def _text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"palavra{rng.randrange(5000)}" for _ in range(words))
+
+
+@pytest.mark.parametrize("words", [2000, 20000, 100000])
+def test_signature_within_budget(words):
+    pytest.importorskip("numpy")
+    text = _text(words)
+    minhash_signature(text)
+
+    timings = []
+    for _ in range(9):
+        start = time.perf_counter()
+        minhash_signature(text)
+        timings.append(time.perf_counter() - start)
+
+    assert sorted(timings)[len(timings) // 2] < SIGNATURE_BUDGET_SECONDS
+
+
+def test_numpy_and_pure_python_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    texts = ["", "uma palavra", _text(300), _text(50000, seed=1)]
+    expected = [minhash_signature(text) for text in texts]
+
+    monkeypatch.setattr(sketches, "_np", None)
+    assert [minhash_signature(text) for text in texts] == expected
+
+
+def test_near_duplicates_have_high_similarity():
+    base = _text(1000)
+    edited = base + " parágrafo final acrescentado"
+    other = _text(1000, seed=2)
+
+    assert estimate_similarity(minhash_signature(base), minhash_signature(edited)) >= 0.8
+    assert estimate_similarity(minhash_signature(base), minhash_signature(other)) < 0.5